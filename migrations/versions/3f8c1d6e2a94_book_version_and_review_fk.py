@@ -0,0 +1,32 @@
+"""book version column and review fk on delete set null
+
+Revision ID: 3f8c1d6e2a94
+Revises: 9b3e6f0a1d27
+Create Date: 2026-10-18 11:24:10.192837
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8c1d6e2a94'
+down_revision: Union[str, None] = '9b3e6f0a1d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.drop_constraint('reviews_book_uid_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key('reviews_book_uid_fkey', 'reviews', 'books', ['book_uid'], ['uid'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('reviews_book_uid_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key('reviews_book_uid_fkey', 'reviews', 'books', ['book_uid'], ['uid'])
+    op.drop_column('books', 'version')
@@ -0,0 +1,35 @@
+"""add hot query indexes
+
+Revision ID: 4d2b7e91c3a5
+Revises: 210c5c189b7a
+Create Date: 2026-10-18 10:41:07.215342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d2b7e91c3a5'
+down_revision: Union[str, None] = '210c5c189b7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_books_user_uid_created_at_uid', 'books', ['user_uid', 'created_at', 'uid'], unique=False)
+    op.create_index('ix_books_created_at_uid', 'books', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_reviews_book_uid_created_at', 'reviews', ['book_uid', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_book_uid_created_at', table_name='reviews')
+    op.drop_index('ix_books_created_at_uid', table_name='books')
+    op.drop_index('ix_books_user_uid_created_at_uid', table_name='books')
+    op.drop_index('ix_users_email', table_name='users')
@@ -0,0 +1,67 @@
+"""book rating aggregates
+
+Revision ID: 7c4e2b9d5f13
+Revises: 3f8c1d6e2a94
+Create Date: 2026-10-18 11:41:52.630184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e2b9d5f13'
+down_revision: Union[str, None] = '3f8c1d6e2a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AGGREGATE_COLUMNS = ['review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in AGGREGATE_COLUMNS:
+        op.add_column('books', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_score', sa.Float(), server_default='0', nullable=False))
+    op.create_index('ix_books_rating_score_uid', 'books', ['rating_score', 'uid'], unique=False)
+
+    # Backfill from existing reviews, using the default prior (mean 3.0, weight 10).
+    # The repair task recomputes the scores if the prior is configured differently.
+    op.execute(
+        """
+        UPDATE books SET
+            review_count = stats.review_count,
+            rating_sum = stats.rating_sum,
+            rating_1 = stats.rating_1,
+            rating_2 = stats.rating_2,
+            rating_3 = stats.rating_3,
+            rating_4 = stats.rating_4,
+            rating_5 = stats.rating_5,
+            rating_score = (10 * 3.0 + stats.rating_sum) / (10 + stats.review_count)
+        FROM (
+            SELECT
+                book_uid,
+                count(*) AS review_count,
+                sum(rating) AS rating_sum,
+                count(*) FILTER (WHERE rating = 1) AS rating_1,
+                count(*) FILTER (WHERE rating = 2) AS rating_2,
+                count(*) FILTER (WHERE rating = 3) AS rating_3,
+                count(*) FILTER (WHERE rating = 4) AS rating_4,
+                count(*) FILTER (WHERE rating = 5) AS rating_5
+            FROM reviews
+            WHERE book_uid IS NOT NULL
+            GROUP BY book_uid
+        ) AS stats
+        WHERE books.uid = stats.book_uid
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_rating_score_uid', table_name='books')
+    op.drop_column('books', 'rating_score')
+    for column in reversed(AGGREGATE_COLUMNS):
+        op.drop_column('books', column)
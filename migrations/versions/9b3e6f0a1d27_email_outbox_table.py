@@ -0,0 +1,43 @@
+"""email outbox table
+
+Revision ID: 9b3e6f0a1d27
+Revises: 4d2b7e91c3a5
+Create Date: 2026-10-18 11:02:36.448190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e6f0a1d27'
+down_revision: Union[str, None] = '4d2b7e91c3a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('email_outbox',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('recipients', sa.JSON(), nullable=False),
+    sa.Column('subject', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('body', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('available_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.Column('dispatched_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('uid')
+    )
+    op.create_index('ix_email_outbox_status_available_at', 'email_outbox', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_status_available_at', table_name='email_outbox')
+    op.drop_table('email_outbox')
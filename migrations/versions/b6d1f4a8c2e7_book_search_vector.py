@@ -0,0 +1,40 @@
+"""book search vector
+
+Revision ID: b6d1f4a8c2e7
+Revises: 7c4e2b9d5f13
+Create Date: 2026-10-18 11:58:03.517420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f4a8c2e7'
+down_revision: Union[str, None] = '7c4e2b9d5f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Kept out of the Book model on purpose: Postgres maintains the column,
+    # and src/books/search.py queries it by name.
+    op.execute(
+        """
+        ALTER TABLE books ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(publisher, '')), 'C')
+        ) STORED
+        """
+    )
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_search_vector', table_name='books', postgresql_using='gin')
+    op.drop_column('books', 'search_vector')
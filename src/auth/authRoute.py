@@ -1,4 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Header,
+    BackgroundTasks,
+    Request,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from src.auth.schemas import (
     UserCreateModel,
@@ -14,17 +22,24 @@ from src.db.main import get_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.auth.utils import (
     create_access_token,
-    verify_password,
+    verify_password_async,
     decode_token,
     create_url_safe_token,
     decode_url_safe_token,
-    generate_hash_password,
+    generate_hash_password_async,
 )
 from datetime import timedelta
 from fastapi.responses import JSONResponse
 from typing import Annotated
-from src.auth.dependencies import AccessTokenBearer, get_current_user, RoleChecker
+from src.auth.dependencies import (
+    AccessTokenBearer,
+    get_current_user,
+    get_token_payload,
+    RoleChecker,
+)
 from src.db.redis import add_jti_to_blocklist
+from src.etag import json_response
+from src.serializers import FastJSONResponse, dump_user_books
 from src.errors import (
     InvalidToken,
     UserAlreadyExists,
@@ -35,7 +50,8 @@ from src.errors import (
 
 from src.mail import create_message, mail
 from src.config import Config
-from src.celery_tasks import send_email
+from src.celery_tasks import email_dispatcher
+from src.outbox import add_email_to_outbox, wake_outbox_drainer
 
 router = APIRouter()
 
@@ -60,13 +76,7 @@ async def send_mail(
         html = "<h1>Welcome to Bookly</h1>"
         subject = "Welcome to our app"
 
-        try:
-            # Below line will work only when there is redis setup in local systmem
-            send_email.delay(emails, subject, html)
-        except Exception as e:
-            print("Error: %s" % e)
-            msg = create_message(emails, subject, html)
-            background_tasks.add_task(mail.send_message, msg)
+        email_dispatcher.enqueue(emails, subject, html, background_tasks)
 
         return {"message": "Email sent"}
 
@@ -81,7 +91,6 @@ async def send_mail(
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def create_user_account(
     user_data: UserCreateModel,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
     email = user_data.email
@@ -92,7 +101,6 @@ async def create_user_account(
         #     status_code=status.HTTP_400_BAD_REQUEST,
         #     detail="User with email already exists",
         # )
-    new_user = await user_service.create_user(user_data, session)
 
     urlSafeToken = create_url_safe_token({"email": email})
 
@@ -105,15 +113,14 @@ async def create_user_account(
     """
     subject = "Bookly: Verify your email"
 
-    try:
-        # Below line will work only when there is redis setup in local or prod systmem
-        send_email.delay([email], subject, html_message)
-
-    except Exception as e:
-
-        print("Error: %s" % e)
-        msg = create_message([email], subject, html_message)
-        background_tasks.add_task(mail.send_message, msg)
+    new_user = await user_service.create_user(
+        user_data,
+        session,
+        outbox_emails=[
+            {"recipients": [email], "subject": subject, "body": html_message}
+        ],
+    )
+    wake_outbox_drainer()
 
     return {
         "message": "Account created! Check email to verify your account",
@@ -157,14 +164,16 @@ async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session),
 ):
-    user = await user_service.get_user_by_email(form_data.username, session)
+    user = await user_service.get_user_by_email(
+        form_data.username, session, use_cache=False
+    )
     if user is None:
         raise UserNotFound()
         # raise HTTPException(
         #     status_code=status.HTTP_404_NOT_FOUND,
         #     detail="User not found",
         # )
-    if not verify_password(form_data.password, user.password_hash):
+    if not await verify_password_async(form_data.password, user.password_hash):
         raise InvalidCredentials()
         # raise HTTPException(
         #     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -275,19 +284,25 @@ async def refresh_token(
     }
 
 
-@router.get("/me", response_model=UserBooksModel)
+@router.get("/me", response_model=UserBooksModel, response_class=FastJSONResponse)
 async def get_current_user(
-    current_user: dict = Depends(get_current_user), role: bool = Depends(role_checker)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    role: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_session),
 ):
-    return current_user
+    books, reviews = await user_service.get_user_books_and_reviews(
+        current_user, session
+    )
+    return json_response(request, dump_user_books(current_user, books, reviews))
 
 
 @router.get("/logout")
 async def logout(
-    current_user: dict = Depends(auth_handler),
+    token_payload: dict = Depends(get_token_payload),
 ):
-    print("Current user: %s" % current_user)
-    jti = current_user["jti"]
+    print("Current user: %s" % token_payload["user"])
+    jti = token_payload["jti"]
 
     # Commented because redix serer is not setup
     await add_jti_to_blocklist(jti)
@@ -308,7 +323,6 @@ async def logout(
 @router.post("/password-reset-request")
 async def password_reset_request(
     email_data: PasswordResetRequestModel,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
     user = await user_service.get_user_by_email(email_data.email, session)
@@ -325,14 +339,9 @@ async def password_reset_request(
     """
     subject = "Bookly: Reset your password"
 
-    try:
-        # Below line will work only when there is redis setup in local or prod systmem
-        send_email.delay([email_data.email], subject, html_message)
-    except Exception as e:
-        print("Error: %s" % e)
-        msg = create_message([email_data.email], subject, html_message)
-        # await mail.send_message(msg)
-        background_tasks.add_task(mail.send_message, msg)
+    add_email_to_outbox(session, [email_data.email], subject, html_message)
+    await session.commit()
+    wake_outbox_drainer()
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -369,7 +378,11 @@ async def password_reset_confirm(
 
     await user_service.update_user(
         user,
-        {"password_hash": generate_hash_password(password_data.new_password)},
+        {
+            "password_hash": await generate_hash_password_async(
+                password_data.new_password
+            )
+        },
         session,
     )
 
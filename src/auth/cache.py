@@ -0,0 +1,153 @@
+import logging
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from src.cache import TTLCache
+from src.config import Config
+from src.db.models import User
+from src.db.redis import token_blocklist as redis_client, subscribe
+
+USER_CACHE_PREFIX = "bookly:user:"
+USER_GENERATION_PREFIX = "bookly:user_gen:"
+USER_INVALIDATION_CHANNEL = "bookly:user_invalidations"
+
+# Only store the row while the user's generation is still the one read
+# before it was loaded, so a row read before an update cannot overwrite
+# the invalidation that followed it.
+SET_IF_GENERATION = """
+if (redis.call("GET", KEYS[2]) or "0") == ARGV[3] then
+    return redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+end
+return false
+"""
+set_if_generation = redis_client.register_script(SET_IF_GENERATION)
+
+Generation = Tuple[int, Optional[int]]
+
+
+class CachedUserRow(BaseModel):
+    """The user columns kept in cache: no relationships and no password hash"""
+
+    uid: UUID
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role: str
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class UserCache:
+    """Per-process LRU in front of a shared Redis tier, keyed by email.
+
+    Every invalidation bumps a generation, per process and per user in
+    Redis. Callers read it with generation() before loading a user from the
+    database, and set() drops the row if it changed in the meantime.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.local = TTLCache(maxsize=Config.USER_CACHE_SIZE)
+        self.local_generation = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+    def _key(self, email: str) -> str:
+        return f"{USER_CACHE_PREFIX}{email}"
+
+    def _generation_key(self, email: str) -> str:
+        return f"{USER_GENERATION_PREFIX}{email}"
+
+    async def generation(self, email: str) -> Generation:
+        if not self.enabled:
+            return self.local_generation, None
+
+        try:
+            shared = int(await redis_client.get(self._generation_key(email)) or 0)
+        except RedisError as e:
+            logging.warning(f"User cache unavailable: {str(e)}")
+            shared = None
+        return self.local_generation, shared
+
+    async def get(self, email: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+
+        row = self.local.get(email)
+        if row is None:
+            try:
+                data = await redis_client.get(self._key(email))
+            except RedisError as e:
+                logging.warning(f"User cache unavailable: {str(e)}")
+                data = None
+
+            if data is None:
+                self.redis_misses += 1
+                return None
+
+            self.redis_hits += 1
+            row = CachedUserRow.model_validate_json(data)
+            self.local.set(email, row, time.time() + Config.USER_CACHE_LOCAL_TTL)
+
+        return User(**row.model_dump())
+
+    async def set(self, user: User, generation: Generation) -> None:
+        if not self.enabled:
+            return
+
+        local_generation, shared_generation = generation
+        if local_generation != self.local_generation:
+            return
+
+        row = CachedUserRow.model_validate(user, from_attributes=True)
+        self.local.set(user.email, row, time.time() + Config.USER_CACHE_LOCAL_TTL)
+        if shared_generation is None:
+            return
+        try:
+            await set_if_generation(
+                keys=[self._key(user.email), self._generation_key(user.email)],
+                args=[row.model_dump_json(), Config.USER_CACHE_TTL, shared_generation],
+            )
+        except RedisError as e:
+            logging.warning(f"User cache unavailable: {str(e)}")
+
+    def forget(self, email: str) -> None:
+        self.local_generation += 1
+        self.local.pop(email)
+
+    async def invalidate(self, email: str) -> None:
+        self.forget(email)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.incr(self._generation_key(email))
+                pipe.delete(self._key(email))
+                pipe.publish(USER_INVALIDATION_CHANNEL, email)
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning(f"User cache invalidation failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.redis_hits + self.redis_misses
+        local = self.local.stats()
+        total = local["hits"] + local["misses"]
+        return {
+            "local": local,
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "hit_rate": self.redis_hits / lookups if lookups else 0.0,
+            },
+            "hit_rate": (local["hits"] + self.redis_hits) / total if total else 0.0,
+        }
+
+
+user_cache = UserCache()
+
+subscribe(USER_INVALIDATION_CHANNEL, user_cache.forget)
@@ -10,8 +10,6 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.main import get_session
 from .schemas import UserLoginModel
 from src.db.redis import token_in_blocklist
-from src.db.main import get_session
-from .service import UserService
 from typing import Any, List
 from src.db.models import User
 from src.errors import (
@@ -28,53 +26,57 @@ userService = UserService()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/user/login")
 
 
-class AccessTokenBearer:
-    async def __call__(
-        self,
-        token: str = Depends(oauth2_scheme),
-        session: AsyncSession = Depends(get_session),
-    ) -> dict:
-        if not token:
-            raise InvalidToken()
-
-        payload = decode_token(token)
-
-        if not payload:
-            raise InvalidToken()
+# FastAPI caches a dependency's result for the whole request when the same
+# callable is used more than once, so the token is decoded and the user is
+# loaded a single time no matter how many dependencies ask for them.
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    if not token:
+        raise InvalidToken()
 
-        # Commented because redix serer is not setup
-        if await token_in_blocklist(payload["jti"]):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "error": "Token has been revoked",
-                    "resolution": "Please get new token",
-                },
-            )
+    payload = decode_token(token)
 
-        if payload.get("refresh"):
-            raise AccessTokenRequired()
+    if not payload:
+        raise InvalidToken()
 
-        user_service = UserService()
-        user = await user_service.get_user_by_email(payload["user"]["email"], session)
+    # Commented because redix serer is not setup
+    if await token_in_blocklist(payload["jti"]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": "Token has been revoked",
+                "resolution": "Please get new token",
+            },
+        )
 
-        if not user:
-            raise UserNotFound()
+    if payload.get("refresh"):
+        raise AccessTokenRequired()
 
-        return payload["user"]
+    return payload
 
 
 async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
+    token_payload: dict = Depends(get_token_payload),
     session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["email"]
+) -> User:
+    user_email = token_payload["user"]["email"]
 
     user = await userService.get_user_by_email(user_email, session)
 
+    if not user:
+        raise UserNotFound()
+
     return user
 
 
+class AccessTokenBearer:
+    async def __call__(
+        self,
+        token_payload: dict = Depends(get_token_payload),
+        current_user: User = Depends(get_current_user),
+    ) -> dict:
+        return token_payload["user"]
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
@@ -82,7 +84,6 @@ class RoleChecker:
     async def __call__(
         self,
         current_user: User = Depends(get_current_user),
-        session: AsyncSession = Depends(get_session),
     ) -> Any:
         if not current_user.is_verified:
             raise AccountNotVerified()
@@ -1,38 +1,74 @@
-from src.db.models import User
+from src.db.models import User, Book, Review
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from .schemas import UserCreateModel
-from .utils import generate_hash_password
+from .utils import generate_hash_password_async
+from .cache import user_cache
+from src.outbox import add_email_to_outbox
+from typing import Sequence
 
 
 class UserService:
-    async def get_user_by_email(self, email: str, session: AsyncSession):
+    async def get_user_by_email(
+        self, email: str, session: AsyncSession, use_cache: bool = True
+    ):
+        # Cached users are detached copies without relationships or
+        # password_hash; pass use_cache=False when those are needed.
+        if use_cache:
+            user = await user_cache.get(email)
+            if user is not None:
+                return user
+            generation = await user_cache.generation(email)
+
         statement = select(User).where(User.email == email)
         result = await session.exec(statement)
         user = result.first()
         print("user: ", user)
 
+        if user is not None and use_cache:
+            await user_cache.set(user, generation)
+
         return user
 
+    async def get_user_books_and_reviews(self, user: User, session: AsyncSession):
+        # Queried by the user's uid, so an already loaded user (possibly a
+        # detached copy from the cache) does not have to be fetched again
+        books = await session.exec(select(Book).where(Book.user_uid == user.uid))
+        reviews = await session.exec(select(Review).where(Review.user_uid == user.uid))
+        return books.all(), reviews.all()
+
     async def user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
         return True if user is not None else False
 
-    async def create_user(self, user_data: UserCreateModel, session: AsyncSession):
+    async def create_user(
+        self,
+        user_data: UserCreateModel,
+        session: AsyncSession,
+        outbox_emails: Sequence[dict] = (),
+    ):
         user_data_dict = user_data.model_dump()
         new_user = User(**user_data_dict)
-        new_user.password_hash = generate_hash_password(user_data.password)
+        new_user.password_hash = await generate_hash_password_async(user_data.password)
         new_user.role = "user"
         session.add(new_user)
+        # Emails are committed with the user, so they cannot get lost
+        for email in outbox_emails:
+            add_email_to_outbox(session, **email)
         await session.commit()
         await session.refresh(new_user)
+        await user_cache.invalidate(new_user.email)
         return new_user
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
+        # The user may be a detached copy from the cache, so update the row
+        # loaded in this session instead.
+        user = await session.get(User, user.uid)
 
         for key, value in user_data.items():
             setattr(user, key, value)
         await session.commit()
         await session.refresh(user)
+        await user_cache.invalidate(user.email)
         return user
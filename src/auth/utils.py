@@ -1,7 +1,14 @@
 from passlib import pwd
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from src.config import Config
+from src.errors import ServiceBusy
+from src.cache import TTLCache
+from src.metrics import PASSWORD_HASH_DURATION
+import asyncio
+import hashlib
+import time
 import jwt
 from uuid import uuid4
 import logging
@@ -11,14 +18,45 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ACCESS_TOKEN_EXPIRY = 3600
 
+# bcrypt takes a few hundred milliseconds per call, so it runs on its own
+# threads instead of the event loop. Jobs beyond the queue limit are shed.
+password_executor = ThreadPoolExecutor(
+    max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+pending_password_jobs = 0
+
 
 def generate_hash_password(password: str) -> str:
-    hash = pwd_context.hash(password)
+    with PASSWORD_HASH_DURATION.labels("hash").time():
+        hash = pwd_context.hash(password)
     return hash
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_DURATION.labels("verify").time():
+        return pwd_context.verify(plain_password, hashed_password)
+
+
+async def run_password_job(func, *args):
+    global pending_password_jobs
+
+    if pending_password_jobs >= Config.PASSWORD_HASH_MAX_PENDING:
+        raise ServiceBusy()
+
+    pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        pending_password_jobs -= 1
+
+
+async def generate_hash_password_async(password: str) -> str:
+    return await run_password_job(generate_hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_job(verify_password, plain_password, hashed_password)
 
 
 # Compare this snippet from src/auth/models.py:
@@ -44,7 +82,13 @@ def create_access_token(
     return access_token
 
 
-def decode_token(token: str):
+# Decoded payloads keyed by a hash of the token. Valid tokens are kept until
+# their own expiry (capped by TOKEN_CACHE_TTL), invalid ones briefly as None.
+token_cache = TTLCache(maxsize=Config.TOKEN_CACHE_SIZE)
+_not_cached = object()
+
+
+def _decode_token(token: str):
     try:
         payload = jwt.decode(
             token, Config.JWT_SECRET_KEY, algorithms=[Config.ALGORITHM]
@@ -57,6 +101,28 @@ def decode_token(token: str):
         return None
 
 
+def decode_token(token: str):
+    if not token:
+        return None
+
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key, _not_cached)
+    if payload is not _not_cached:
+        return payload
+
+    payload = _decode_token(token)
+    now = time.time()
+    if payload is None:
+        token_cache.set(key, None, now + Config.INVALID_TOKEN_CACHE_TTL)
+    else:
+        token_cache.set(
+            key,
+            payload,
+            min(payload.get("exp", now), now + Config.TOKEN_CACHE_TTL),
+        )
+    return payload
+
+
 serializer = URLSafeTimedSerializer(Config.JWT_SECRET_KEY, salt="email-configuration")
 
 
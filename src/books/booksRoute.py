@@ -1,9 +1,30 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from . import schemas
-from typing import List
-from ..db.main import get_session
+from typing import List, Literal, Optional
+from uuid import UUID
+from ..db.main import get_session, get_session_maker
+from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .service import BookService
+from .service import BookService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .cache import response_cache
+from src.singleflight import SingleFlight
+from src.etag import (
+    version_etag,
+    if_match_versions,
+    etag_matches,
+    not_modified,
+    json_response,
+)
+from src.serializers import (
+    FastJSONResponse,
+    dump_book,
+    dump_books,
+    dump_book_batch,
+    dump_book_page,
+    dump_search_page,
+    dump_book_detail,
+)
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
 from src.errors import (
     BookNotFound,
@@ -13,50 +34,217 @@ router = APIRouter()
 book_service = BookService()
 auth_handler = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["admin", "user"]))
+book_detail_flight = SingleFlight("book_detail")
 
 
-@router.get("/", response_model=List[schemas.BookModel], dependencies=[role_checker])
+@router.get(
+    "/",
+    response_model=schemas.BookPageModel,
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
+)
 async def get_all_books(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(auth_handler),
 ):
-    books = await book_service.get_all_books(session)
-    return books
+    async def load(session: AsyncSession):
+        books = await book_service.get_all_books(session, limit, cursor)
+        return dump_book_page(books)
+
+    body = await response_cache.get_or_load(
+        "books:list", {"limit": limit, "cursor": cursor}, ["books"], load, session
+    )
+    return json_response(request, body)
 
 
 @router.get(
     "/user/{user_uid}",
-    response_model=List[schemas.BookModel],
+    response_model=schemas.BookPageModel,
+    response_class=FastJSONResponse,
     dependencies=[role_checker],
 )
 async def get_user_books_submissions(
-    user_uid: str,
+    request: Request,
+    user_uid: UUID,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(auth_handler),
 ):
-    books = await book_service.get_user_books(user_uid, session)
-    return books
+    async def load(session: AsyncSession):
+        books = await book_service.get_user_books(user_uid, session, limit, cursor)
+        return dump_book_page(books)
+
+    body = await response_cache.get_or_load(
+        "books:user",
+        {"user_uid": user_uid, "limit": limit, "cursor": cursor},
+        ["books"],
+        load,
+        session,
+    )
+    return json_response(request, body)
+
+
+@router.post(
+    "/batch",
+    response_model=schemas.BookBatchModel,
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
+)
+async def get_books_batch(
+    batch: schemas.BookBatchRequestModel,
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(auth_handler),
+):
+    uids = list(dict.fromkeys(batch.uids))
+    books = await book_service.get_books_by_ids(uids, session)
+    found = [book for book in books if book is not None]
+    missing = [uid for uid, book in zip(uids, books) if book is None]
+    return FastJSONResponse(dump_book_batch(found, missing))
+
+
+@router.get(
+    "/search",
+    response_model=schemas.BookSearchPageModel,
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
+)
+async def search_books(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(auth_handler),
+):
+    async def load(session: AsyncSession):
+        page = await book_service.search_books(q, session, limit, offset)
+        return dump_search_page(page)
+
+    body = await response_cache.get_or_load(
+        "books:search",
+        {"q": q, "limit": limit, "offset": offset},
+        ["books"],
+        load,
+        session,
+    )
+    return json_response(request, body)
 
 
 @router.get(
-    "/{book_uid}", response_model=schemas.BookDetailModel, dependencies=[role_checker]
+    "/top-rated",
+    response_model=List[schemas.BookModel],
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
+)
+async def get_top_rated_books(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(auth_handler),
+):
+    async def load(session: AsyncSession):
+        return dump_books(await book_service.get_top_rated_books(session, limit))
+
+    body = await response_cache.get_or_load(
+        "books:top_rated", {"limit": limit}, ["books"], load, session
+    )
+    return json_response(request, body)
+
+
+@router.get("/export", dependencies=[role_checker])
+async def export_books(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session_maker: sessionmaker = Depends(get_session_maker),
+    current_user: dict = Depends(auth_handler),
+):
+    # The request-scoped session is closed before a streamed body is sent,
+    # so the export opens its own for as long as the client keeps reading
+    async def stream():
+        async with session_maker() as session:
+            async for chunk in book_service.export_books(session, format):
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson" if format == "ndjson" else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
+
+
+@router.post(
+    "/import",
+    response_model=schemas.BookImportResultModel,
+    dependencies=[role_checker],
+)
+async def import_books(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(auth_handler),
+):
+    user_uid = UUID(current_user["uid"])
+    return await book_service.import_books(request.stream(), user_uid, session, format)
+
+
+@router.get(
+    "/{book_uid}",
+    response_model=schemas.BookDetailModel,
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
 )
 async def get_book_by_id(
-    book_uid: str,
+    request: Request,
+    book_uid: UUID,
     session: AsyncSession = Depends(get_session),
+    session_maker: sessionmaker = Depends(get_session_maker),
     current_user: dict = Depends(auth_handler),
 ):
-    book = await book_service.get_book_by_id(book_uid, session)
-    if book:
-        return book
+    async def load(session: AsyncSession):
+        book = await book_service.get_book_by_id(book_uid, session, with_reviews=True)
+        if book is None:
+            return None
+        return dump_book_detail(book)
+
+    version = await book_service.get_book_version(book_uid, session)
+    if version is None:
+        raise BookNotFound()
+    etag = version_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Give the request's connection (also used for the auth lookup) back to
+    # the pool, so requests waiting on another one's fetch below hold none
+    await session.close()
+
+    # Concurrent reads of the same version share one cache lookup, query and
+    # serialization. It runs on its own session, since it may outlive this request.
+    async def fetch():
+        async with session_maker() as session:
+            # keyed by the ETag too, so a stale cached body never goes out
+            # under a newer tag
+            return await response_cache.get_or_load(
+                "book",
+                {"uid": book_uid, "etag": etag},
+                [f"book:{book_uid}"],
+                load,
+                session,
+            )
+
+    body = await book_detail_flight.do((book_uid, etag), fetch)
+    if body:
+        return json_response(request, body, etag)
     raise BookNotFound()
-    # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
 
 @router.post(
     "/",
     status_code=status.HTTP_201_CREATED,
     response_model=schemas.BookModel,
+    response_class=FastJSONResponse,
     dependencies=[role_checker],
 )
 async def create_book(
@@ -65,35 +253,47 @@ async def create_book(
     current_user: dict = Depends(auth_handler),
 ):
     print("current_user:: ", current_user)
-    user_uid = current_user["uid"]
+    user_uid = UUID(current_user["uid"])
     new_book = await book_service.create_book(book, user_uid, session)
-    return new_book
+    return FastJSONResponse(dump_book(new_book), status_code=status.HTTP_201_CREATED)
 
 
 @router.put(
-    "/{book_uid}", response_model=schemas.BookModel, dependencies=[role_checker]
+    "/{book_uid}",
+    response_model=schemas.BookModel,
+    response_class=FastJSONResponse,
+    dependencies=[role_checker],
 )
 async def update_book(
-    book_uid: str,
+    request: Request,
+    book_uid: UUID,
     book_data: schemas.BookModelUpdate,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(auth_handler),
 ):
-    book_to_update = await book_service.update_book(book_uid, book_data, session)
+    book_to_update = await book_service.update_book(
+        book_uid, book_data, session, if_match_versions(request)
+    )
     if book_to_update:
-        return book_to_update
+        return FastJSONResponse(
+            dump_book(book_to_update),
+            headers={"ETag": version_etag(book_to_update.version)},
+        )
     raise BookNotFound()
     # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
 
 @router.delete("/{book_uid}", dependencies=[role_checker])
 async def delete_book(
-    book_uid: str,
+    request: Request,
+    book_uid: UUID,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(auth_handler),
 ):
-    book_to_delete = await book_service.delete_book(book_uid, session)
-    if book_to_delete:
-        return {"Deleted book with UID": book_to_delete.uid}
+    deleted_uid = await book_service.delete_book(
+        book_uid, session, if_match_versions(request)
+    )
+    if deleted_uid:
+        return {"Deleted book with UID": deleted_uid}
     raise BookNotFound()
     # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
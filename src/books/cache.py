@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_session_maker
+from src.db.redis import token_blocklist as redis_client
+
+RESPONSE_CACHE_PREFIX = "bookly:response:"
+TAG_VERSION_PREFIX = "bookly:tag:"
+
+Loader = Callable[[AsyncSession], Awaitable[Optional[bytes]]]
+
+
+class ResponseCache:
+    """Caches serialized JSON responses in Redis.
+
+    Every entry is keyed by its route, parameters and the current version of
+    each tag it depends on. Writes bump the tag versions, so stale keys are
+    never read again and simply expire. Entries past their fresh TTL are
+    still served for RESPONSE_CACHE_STALE_TTL seconds while one request
+    refreshes them in the background. A short Redis lock lets only one
+    request rebuild a missing entry while the others wait for it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.refresh_tasks = set()
+
+    async def _key(self, route: str, params: dict, tags: list[str]) -> str:
+        versions = await redis_client.mget(
+            [f"{TAG_VERSION_PREFIX}{tag}" for tag in tags]
+        )
+        raw = json.dumps([params, [int(v or 0) for v in versions]], default=str)
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"{RESPONSE_CACHE_PREFIX}{route}:{digest}"
+
+    async def _store(self, key: str, body: bytes) -> None:
+        fresh_until = time.time() + Config.RESPONSE_CACHE_TTL
+        await redis_client.set(
+            key,
+            f"{fresh_until:.3f}\n".encode() + body,
+            ex=Config.RESPONSE_CACHE_TTL + Config.RESPONSE_CACHE_STALE_TTL,
+        )
+
+    async def _lock(self, key: str) -> bool:
+        return bool(
+            await redis_client.set(
+                f"{key}:lock", "", nx=True, px=Config.RESPONSE_CACHE_LOCK_MS
+            )
+        )
+
+    async def _load_and_store(self, key: str, loader: Loader, session: AsyncSession):
+        try:
+            body = await loader(session)
+            if body is not None:
+                await self._store(key, body)
+            return body
+        finally:
+            await redis_client.delete(f"{key}:lock")
+
+    async def _refresh(self, key: str, loader: Loader) -> None:
+        try:
+            async with async_session_maker() as session:
+                await self._load_and_store(key, loader, session)
+        except Exception as e:
+            logging.warning(f"Response cache refresh failed: {str(e)}")
+
+    async def get_or_load(
+        self,
+        route: str,
+        params: dict,
+        tags: list[str],
+        loader: Loader,
+        session: AsyncSession,
+    ) -> Optional[bytes]:
+        if not self.enabled:
+            return await loader(session)
+
+        try:
+            key = await self._key(route, params, tags)
+            entry = await redis_client.get(key)
+
+            if entry is None:
+                if await self._lock(key):
+                    return await self._load_and_store(key, loader, session)
+
+                # Someone else is rebuilding this entry: wait for it briefly
+                for _ in range(Config.RESPONSE_CACHE_LOCK_MS // 25):
+                    await asyncio.sleep(0.025)
+                    entry = await redis_client.get(key)
+                    if entry is not None:
+                        break
+                else:
+                    return await loader(session)
+
+            fresh_until, body = entry.split(b"\n", 1)
+            if float(fresh_until) < time.time() and await self._lock(key):
+                task = asyncio.create_task(self._refresh(key, loader))
+                self.refresh_tasks.add(task)
+                task.add_done_callback(self.refresh_tasks.discard)
+            return body
+        except RedisError as e:
+            logging.warning(f"Response cache unavailable: {str(e)}")
+            return await loader(session)
+
+    async def invalidate(self, *tags: str) -> None:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(f"{TAG_VERSION_PREFIX}{tag}")
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning(f"Response cache invalidation failed: {str(e)}")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import Book
+
+LOADER_MAX_BATCH = 500
+
+
+class BookLoader:
+    """Coalesces the get_book_by_id calls made on one session into batched queries
+
+    Every load() issued before the event loop gets back to the loader (for
+    example from an asyncio.gather) is answered by a single
+    `WHERE uid = ANY(...)` query. Loaders live in session.info, so they are
+    scoped to the request that owns the session.
+    """
+
+    def __init__(self, session: AsyncSession, with_reviews: bool = False) -> None:
+        self.session = session
+        self.with_reviews = with_reviews
+        self.pending: dict[UUID, asyncio.Future] = {}
+        self.dispatch_tasks: set[asyncio.Task] = set()
+        # shared by every loader on the session, so they never query at once
+        self.lock = session.info.setdefault("book_loader_lock", asyncio.Lock())
+
+    @classmethod
+    def for_session(cls, session: AsyncSession, with_reviews: bool = False):
+        key = ("book_loader", with_reviews)
+        if key not in session.info:
+            session.info[key] = cls(session, with_reviews)
+        return session.info[key]
+
+    def _uid_filter(self, uids: list):
+        if self.session.bind.dialect.name == "postgresql":
+            # one array parameter, so every batch size shares a prepared statement
+            return Book.uid == sa.any_(sa.literal(uids, pg.ARRAY(pg.UUID)))
+        return Book.uid.in_(uids)
+
+    async def load(self, uid: UUID) -> Optional[Book]:
+        if not isinstance(uid, UUID):
+            uid = UUID(uid)
+        future = self.pending.get(uid)
+        if future is None:
+            if not self.pending:
+                # runs once the callers scheduled alongside this one have queued up
+                task = asyncio.ensure_future(self._dispatch())
+                self.dispatch_tasks.add(task)
+                task.add_done_callback(self.dispatch_tasks.discard)
+            future = asyncio.get_running_loop().create_future()
+            self.pending[uid] = future
+        return await future
+
+    async def load_many(self, uids: list) -> list[Optional[Book]]:
+        return await asyncio.gather(*[self.load(uid) for uid in uids])
+
+    async def _dispatch(self) -> None:
+        # An AsyncSession runs one statement at a time. Loads that arrive while
+        # another dispatch is querying start a new dispatch, which waits here and
+        # picks up everything that queued in the meantime.
+        async with self.lock:
+            pending, self.pending = self.pending, {}
+            await self._fetch(pending)
+
+    async def _fetch(self, pending: dict) -> None:
+        uids = list(pending)
+        try:
+            books = {}
+            for start in range(0, len(uids), LOADER_MAX_BATCH):
+                statement = select(Book).where(
+                    self._uid_filter(uids[start : start + LOADER_MAX_BATCH])
+                )
+                if self.with_reviews:
+                    statement = statement.options(selectinload(Book.reviews))
+                result = await self.session.exec(statement)
+                books.update((book.uid, book) for book in result.all())
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for uid, future in pending.items():
+            if not future.done():
+                future.set_result(books.get(uid))
@@ -0,0 +1,97 @@
+from sqlalchemy import case, exists, or_
+from sqlmodel import select, update, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import Config
+from src.db.models import Book, Review
+from .cache import response_cache
+
+RATING_LEVELS = range(1, 6)
+AGGREGATE_COLUMNS = ["review_count", "rating_sum"] + [
+    f"rating_{level}" for level in RATING_LEVELS
+]
+
+
+def bayesian_score(rating_sum, review_count):
+    """The mean rating, pulled towards RATING_PRIOR_MEAN for books with few reviews"""
+    prior_weight = Config.RATING_PRIOR_WEIGHT
+    return case(
+        (
+            review_count > 0,
+            (prior_weight * Config.RATING_PRIOR_MEAN + rating_sum)
+            / (prior_weight + review_count),
+        ),
+        else_=0.0,
+    )
+
+
+def rating_update_values(rating: int, delta: int = 1) -> dict:
+    """UPDATE values that add (delta=1) or remove (delta=-1) one rating on a book"""
+    values = {
+        "review_count": Book.review_count + delta,
+        "rating_sum": Book.rating_sum + delta * rating,
+        "rating_score": bayesian_score(
+            Book.rating_sum + delta * rating, Book.review_count + delta
+        ),
+    }
+    if rating in RATING_LEVELS:
+        values[f"rating_{rating}"] = getattr(Book, f"rating_{rating}") + delta
+    return values
+
+
+async def recompute_rating_aggregates(session: AsyncSession) -> int:
+    """Recomputes book aggregates from their reviews, returning how many drifted"""
+    stats = (
+        select(
+            Review.book_uid,
+            func.count().label("review_count"),
+            func.sum(Review.rating).label("rating_sum"),
+            *[
+                func.count(case((Review.rating == level, 1))).label(f"rating_{level}")
+                for level in RATING_LEVELS
+            ],
+        )
+        .where(Review.book_uid.is_not(None))
+        .group_by(Review.book_uid)
+        .subquery()
+    )
+    score = bayesian_score(stats.c.rating_sum, stats.c.review_count)
+    drifted = (
+        update(Book)
+        .where(Book.uid == stats.c.book_uid)
+        .where(
+            or_(
+                Book.rating_score != score,
+                *[
+                    getattr(Book, column) != stats.c[column]
+                    for column in AGGREGATE_COLUMNS
+                ],
+            )
+        )
+        .values(
+            version=Book.version + 1,
+            rating_score=score,
+            **{column: stats.c[column] for column in AGGREGATE_COLUMNS},
+        )
+    )
+    unreviewed = (
+        update(Book)
+        .where(
+            or_(
+                Book.rating_score != 0,
+                *[getattr(Book, column) != 0 for column in AGGREGATE_COLUMNS],
+            )
+        )
+        .where(~exists().where(Review.book_uid == Book.uid))
+        .values(
+            version=Book.version + 1,
+            rating_score=0.0,
+            **{column: 0 for column in AGGREGATE_COLUMNS},
+        )
+    )
+
+    repaired = (await session.exec(drifted)).rowcount
+    repaired += (await session.exec(unreviewed)).rowcount
+    await session.commit()
+    if repaired:
+        await response_cache.invalidate("books")
+    return repaired
@@ -1,11 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from datetime import datetime, date
 from src.reviews.schemas import ReviewModel
 
 # from src.auth.schemas import UserModel
 
+MAX_BATCH_SIZE = 500
+
 
 class BookBaseModel(BaseModel):
     title: str
@@ -20,6 +22,9 @@ class BookBaseModel(BaseModel):
 
 class BookModel(BookBaseModel):
     uid: UUID
+    version: int
+    review_count: int
+    rating_score: float
 
 
 class BookDetailModel(BookModel):
@@ -27,6 +32,32 @@ class BookDetailModel(BookModel):
     reviews: List[ReviewModel]
 
 
+class BookPageModel(BaseModel):
+    items: List[BookModel]
+    next_cursor: Optional[str] = None
+
+
+class BookSearchResultModel(BookModel):
+    rank: float
+    highlights: Dict[str, str]
+
+
+class BookSearchPageModel(BaseModel):
+    items: List[BookSearchResultModel]
+    next_offset: Optional[int] = None
+
+
+class BookBatchRequestModel(BaseModel):
+    uids: List[UUID] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="Book IDs"
+    )
+
+
+class BookBatchModel(BaseModel):
+    items: List[BookModel]
+    missing: List[UUID]
+
+
 class BookModelUpdate(BaseModel):
     title: Optional[str] = Field(None, description="Book Title")
     author: Optional[str] = Field(None, description="Book Author")
@@ -42,3 +73,14 @@ class BookModelCreate(BaseModel):
     published_date: str = Field(description="Book Published Date", default="2020-02-03")
     page_count: int = Field(..., description="Book Page Count")
     language: str = Field(..., description="Book Language")
+
+
+class BookImportErrorModel(BaseModel):
+    line: int
+    error: str
+
+
+class BookImportResultModel(BaseModel):
+    imported: int
+    failed: int
+    errors: List[BookImportErrorModel]
@@ -0,0 +1,177 @@
+"""
+Full-text search over book titles, authors and publishers.
+
+On Postgres the search runs against books.search_vector, a generated
+tsvector column with a GIN index. The column is added by a migration and
+left out of the Book model, so it is never written by the app. Other
+databases (SQLite in tests and local development) fall back to an
+in-process inverted index. Both backends expose the same search_books
+method and return the same page shape.
+"""
+
+import html
+import re
+from collections import defaultdict
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlmodel import select, desc, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import Book
+
+SEARCH_CONFIG = "english"
+SEARCH_FIELDS = ("title", "author", "publisher")
+# Postgres' default ts_rank weights for the A, B and C labels the
+# search_vector gives these fields
+FIELD_WEIGHTS = {"title": 1.0, "author": 0.4, "publisher": 0.2}
+# Matches are first wrapped in these control characters, then the text is
+# HTML-escaped and only then are they turned into <b> tags, so markup stored
+# in a book's fields is never returned unescaped
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", HighlightAll=true'
+)
+
+
+class PostgresBookSearch:
+    def _statement(self, q: str, limit: int, offset: int):
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        vector = sa.literal_column("books.search_vector")
+
+        # Rank and page first, then highlight only the rows being returned
+        matches = (
+            select(Book.uid, func.ts_rank_cd(vector, query).label("rank"))
+            .where(vector.op("@@")(query))
+            .order_by(desc("rank"), desc(Book.uid))
+            .limit(limit + 1)
+            .offset(offset)
+            .subquery()
+        )
+        headlines = [
+            func.ts_headline(
+                SEARCH_CONFIG, getattr(Book, field), query, HEADLINE_OPTIONS
+            ).label(f"{field}_headline")
+            for field in SEARCH_FIELDS
+        ]
+        return (
+            select(Book, matches.c.rank, *headlines)
+            .join(matches, matches.c.uid == Book.uid)
+            .order_by(desc(matches.c.rank), desc(Book.uid))
+        )
+
+    async def search_books(
+        self, q: str, session: AsyncSession, limit: int, offset: int = 0
+    ):
+        result = await session.exec(self._statement(q, limit, offset))
+        items = [
+            {
+                "book": book,
+                "rank": rank,
+                "highlights": {
+                    field: mark_highlights(headline)
+                    for field, headline in zip(SEARCH_FIELDS, headlines)
+                },
+            }
+            for book, rank, *headlines in result.all()
+        ]
+        return _page(items, limit, offset)
+
+
+class InvertedIndexBookSearch:
+    """Term -> book postings rebuilt from the books table whenever it changes
+
+    Whether the table has changed is judged by the row count, the sum of row
+    versions and the newest created_at, fetched with one aggregate query per
+    search. That is fine for tests and local development; production uses
+    PostgresBookSearch.
+    """
+
+    def __init__(self) -> None:
+        self.postings = defaultdict(dict)
+        self.stamp = None
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        stamp_query = select(
+            func.count(), func.sum(Book.version), func.max(Book.created_at)
+        )
+        stamp = tuple((await session.exec(stamp_query)).first())
+        if stamp == self.stamp:
+            return
+
+        result = await session.exec(
+            select(Book.uid, *[getattr(Book, f) for f in SEARCH_FIELDS])
+        )
+        postings = defaultdict(dict)
+        for uid, *texts in result.all():
+            for field, text in zip(SEARCH_FIELDS, texts):
+                for term in tokenize(text):
+                    postings[term][uid] = (
+                        postings[term].get(uid, 0) + FIELD_WEIGHTS[field]
+                    )
+        self.postings, self.stamp = postings, stamp
+
+    async def search_books(
+        self, q: str, session: AsyncSession, limit: int, offset: int = 0
+    ):
+        await self._refresh(session)
+        terms = set(tokenize(q))
+        if not terms:
+            return _page([], limit, offset)
+
+        matches = set.intersection(*[set(self.postings.get(t, ())) for t in terms])
+        ranked = sorted(
+            ((sum(self.postings[t][uid] for t in terms), uid) for uid in matches),
+            reverse=True,
+        )[offset : offset + limit + 1]
+
+        result = await session.exec(
+            select(Book).where(Book.uid.in_([uid for _, uid in ranked]))
+        )
+        books = {book.uid: book for book in result.all()}
+        pattern = re.compile(
+            r"\b(%s)\b" % "|".join(map(re.escape, terms)), flags=re.IGNORECASE
+        )
+        items = [
+            {
+                "book": books[uid],
+                "rank": rank,
+                "highlights": {
+                    field: mark_highlights(
+                        pattern.sub(
+                            f"{HIGHLIGHT_START}\\1{HIGHLIGHT_STOP}",
+                            getattr(books[uid], field),
+                        )
+                    )
+                    for field in SEARCH_FIELDS
+                },
+            }
+            for rank, uid in ranked
+            if uid in books
+        ]
+        return _page(items, limit, offset)
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def mark_highlights(text: str) -> str:
+    return (
+        html.escape(text)
+        .replace(HIGHLIGHT_START, "<b>")
+        .replace(HIGHLIGHT_STOP, "</b>")
+    )
+
+
+def _page(items: list, limit: int, offset: int) -> dict:
+    next_offset = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_offset = offset + limit
+    return {"items": items, "next_offset": next_offset}
+
+
+postgres_search = PostgresBookSearch()
+fallback_search = InvertedIndexBookSearch()
@@ -1,30 +1,152 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.models import Book
 from .schemas import BookModelCreate, BookModelUpdate
-from sqlmodel import select, desc
+from .utils import encode_cursor, decode_cursor, iter_lines
+from .cache import response_cache
+from .search import postgres_search, fallback_search
+from .loader import BookLoader
+from src.errors import PreconditionFailed
+from sqlmodel import select, desc, tuple_, func
 from datetime import datetime
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+from pydantic import ValidationError
+import sqlalchemy as sa
+import csv
+import io
+import orjson
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+EXPORT_FIELDS = (
+    "uid",
+    "title",
+    "author",
+    "publisher",
+    "published_date",
+    "page_count",
+    "language",
+    "user_uid",
+    "created_at",
+    "updated_at",
+)
 
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    async def _get_books_page(
+        self, statement, session: AsyncSession, limit: int, cursor: Optional[str]
+    ):
+        if cursor:
+            created_at, uid = decode_cursor(cursor)
+            statement = statement.where(
+                tuple_(Book.created_at, Book.uid) < tuple_(created_at, uid)
+            )
+        statement = statement.order_by(desc(Book.created_at), desc(Book.uid)).limit(
+            limit + 1
+        )
         result = await session.exec(statement)
-        return result.all()
+        books = result.all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            next_cursor = encode_cursor(books[-1].created_at, books[-1].uid)
+        return {"items": books, "next_cursor": next_cursor}
+
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        return await self._get_books_page(select(Book), session, limit, cursor)
+
+    async def get_user_books(
+        self,
+        user_uid: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = select(Book).where(Book.user_uid == user_uid)
+        return await self._get_books_page(statement, session, limit, cursor)
+
+    async def get_book_by_id(
+        self, book_uid: str, session: AsyncSession, with_reviews: bool = False
+    ):
+        loader = BookLoader.for_session(session, with_reviews)
+        return await loader.load(book_uid)
 
-    async def get_user_books(self, user_uid: str, session: AsyncSession):
+    async def get_books_by_ids(self, book_uids: list, session: AsyncSession):
+        return await BookLoader.for_session(session).load_many(book_uids)
+
+    async def search_books(
+        self,
+        q: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        offset: int = 0,
+    ):
+        if session.bind.dialect.name == "postgresql":
+            backend = postgres_search
+        else:
+            backend = fallback_search
+        return await backend.search_books(q, session, limit, offset)
+
+    async def get_top_rated_books(self, session: AsyncSession, limit: int):
         statement = (
             select(Book)
-            .where(Book.user_uid == user_uid)
-            .order_by(desc(Book.created_at))
+            .where(Book.review_count > 0)
+            .order_by(desc(Book.rating_score), desc(Book.uid))
+            .limit(limit)
         )
         result = await session.exec(statement)
         return result.all()
 
-    async def get_book_by_id(self, book_uid: str, session: AsyncSession):
-        statement = select(Book).where(Book.uid == book_uid)
+    async def get_book_version(self, book_uid: str, session: AsyncSession):
+        """Returns the book's row version, which its ETag is derived from"""
+        statement = select(Book.version).where(Book.uid == book_uid)
         result = await session.exec(statement)
         return result.first()
 
+    async def export_books(
+        self, session: AsyncSession, format: str = "ndjson"
+    ) -> AsyncIterator[bytes]:
+        """Yields the whole catalog with review aggregates, one batch of rows per chunk
+
+        Rows come from a server-side cursor, so only EXPORT_BATCH_SIZE of them
+        are held in memory at a time.
+        """
+        average_rating = Book.rating_sum / func.nullif(
+            sa.cast(Book.review_count, sa.Float), 0
+        )
+        statement = (
+            select(
+                *[getattr(Book, field) for field in EXPORT_FIELDS],
+                Book.review_count,
+                average_rating.label("average_rating"),
+            )
+            .order_by(Book.created_at, Book.uid)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await session.stream(statement)
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(result.keys())
+            async for rows in result.partitions():
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        else:
+            async for rows in result.partitions():
+                yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
     async def create_book(
         self, book_data: BookModelCreate, user_uid: str, session: AsyncSession
     ):
@@ -33,25 +155,130 @@ class BookService:
         book.user_uid = user_uid
         session.add(book)
         await session.commit()
+        await response_cache.invalidate("books")
         return book if book is not None else None
 
-    async def update_book(
-        self, book_uid: str, book_data: BookModelUpdate, session: AsyncSession
+    def _parse_import_row(self, line: bytes, format: str, header: list) -> dict:
+        if format == "csv":
+            data = dict(zip(header, next(csv.reader([line.decode()]))))
+        else:
+            data = orjson.loads(line)
+        book = BookModelCreate.model_validate(data).model_dump()
+        book["published_date"] = datetime.strptime(book["published_date"], "%Y-%m-%d")
+        return book
+
+    async def import_books(
+        self,
+        chunks: AsyncIterator[bytes],
+        user_uid: str,
+        session: AsyncSession,
+        format: str = "ndjson",
     ):
+        """Validates and inserts a streamed NDJSON or CSV catalog, one record per line
 
-        book_to_update = await self.get_book_by_id(book_uid, session)
-        if book_to_update:
-            book_data = book_data.model_dump(exclude_unset=True)
-            for key, value in book_data.items():
-                setattr(book_to_update, key, value)
-            await session.commit()
-            return book_to_update
-        return None
+        Valid rows are written IMPORT_BATCH_SIZE at a time with one executemany
+        INSERT, which the driver sends as a batch, and committed per batch.
+        Invalid rows are reported by line number and skipped without affecting
+        the rest of their batch.
+        """
+        imported, failed, errors = 0, 0, []
+        header = None
+        batch = []
+
+        async def flush():
+            nonlocal imported
+            if batch:
+                connection = await session.connection()
+                await connection.execute(sa.insert(Book.__table__), batch)
+                await session.commit()
+                imported += len(batch)
+                batch.clear()
+
+        async for number, line in iter_lines(chunks):
+            try:
+                if format == "csv" and header is None:
+                    header = next(csv.reader([line.decode()]))
+                    continue
+                book = self._parse_import_row(line, format, header)
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                )
+            except ValueError as e:
+                error = str(e)
+            else:
+                now = datetime.now()
+                book.update(
+                    uid=uuid4(), user_uid=user_uid, created_at=now, updated_at=now
+                )
+                batch.append(book)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await flush()
+                continue
 
-    async def delete_book(self, book_uid: str, session: AsyncSession):
-        book_to_delete = await self.get_book_by_id(book_uid, session)
-        if book_to_delete:
-            await session.delete(book_to_delete)
-            await session.commit()
-            return book_to_delete
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"line": number, "error": error})
+
+        await flush()
+        if imported:
+            await response_cache.invalidate("books")
+        return {"imported": imported, "failed": failed, "errors": errors}
+
+    async def _missing_or_modified(
+        self, book_uid: str, session: AsyncSession, expected_versions: Optional[list]
+    ):
+        # Only reached when the conditional write matched no row
+        if expected_versions is not None:
+            if await self.get_book_version(book_uid, session) is not None:
+                raise PreconditionFailed()
         return None
+
+    async def update_book(
+        self,
+        book_uid: str,
+        book_data: BookModelUpdate,
+        session: AsyncSession,
+        expected_versions: Optional[list] = None,
+    ):
+        statement = (
+            sa.update(Book)
+            .where(Book.uid == book_uid)
+            .values(
+                **book_data.model_dump(exclude_unset=True),
+                updated_at=func.now(),
+                version=Book.version + 1,
+            )
+            .returning(Book)
+        )
+        if expected_versions is not None:
+            statement = statement.where(Book.version.in_(expected_versions))
+
+        result = await session.exec(statement)
+        book_to_update = result.scalars().first()
+        if book_to_update is None:
+            return await self._missing_or_modified(book_uid, session, expected_versions)
+
+        await session.commit()
+        await response_cache.invalidate("books", f"book:{book_uid}")
+        return book_to_update
+
+    async def delete_book(
+        self,
+        book_uid: str,
+        session: AsyncSession,
+        expected_versions: Optional[list] = None,
+    ):
+        statement = sa.delete(Book).where(Book.uid == book_uid).returning(Book.uid)
+        if expected_versions is not None:
+            statement = statement.where(Book.version.in_(expected_versions))
+
+        result = await session.exec(statement)
+        deleted_uid = result.scalar()
+        if deleted_uid is None:
+            return await self._missing_or_modified(book_uid, session, expected_versions)
+
+        await session.commit()
+        await response_cache.invalidate("books", f"book:{book_uid}")
+        return deleted_uid
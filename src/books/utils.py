@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator
+from uuid import UUID
+from src.errors import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, uid: UUID) -> str:
+    data = json.dumps({"created_at": created_at.isoformat(), "uid": str(uid)})
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(data["created_at"]), UUID(data["uid"])
+    except Exception:
+        raise InvalidCursor()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """Splits a streamed request body into numbered, non-blank lines"""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line.rstrip(b"\r")
+    if buffer.strip():
+        yield number + 1, buffer.rstrip(b"\r")
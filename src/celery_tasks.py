@@ -1,6 +1,20 @@
 from celery import Celery
-from src.mail import mail, create_message
-from asgiref.sync import async_to_sync
+from fastapi import BackgroundTasks
+from src.mail import mail, create_message, smtp_pool
+from src.config import Config
+from src.metrics import EMAIL_ENQUEUE_LATENCY
+from src.db.main import async_session_maker
+from src.db.models import EmailOutbox
+from src.books.ratings import recompute_rating_aggregates
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import asyncio
+import logging
+import threading
+import time
 
 """
 # To start the celery server to send the emails in background worked
@@ -24,10 +38,194 @@ c_app = Celery()
 c_app.config_from_object("src.config")
 
 
+# Each worker process keeps one event loop running in a background thread,
+# so pooled SMTP connections survive between tasks.
+worker_loop: Optional[asyncio.AbstractEventLoop] = None
+worker_loop_lock = threading.Lock()
+
+
+def run_in_worker_loop(coroutine):
+    global worker_loop
+
+    with worker_loop_lock:
+        if worker_loop is None:
+            worker_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=worker_loop.run_forever, name="email-loop", daemon=True
+            ).start()
+
+    return asyncio.run_coroutine_threadsafe(coroutine, worker_loop).result()
+
+
 @c_app.task()
 def send_email(recipients: list[str], subject: str, body: str):
 
     message = create_message(recipients=recipients, subject=subject, body=body)
 
-    async_to_sync(mail.send_message)(message)
-    print("Email sent")
+    sent, failed = run_in_worker_loop(smtp_pool.send_messages([message]))
+    if failed:
+        # Let Celery record the failure instead of losing the email silently
+        raise failed[0]
+
+
+@c_app.task()
+def send_email_batch(messages: list[dict]):
+    """Send many create_message payloads over a single SMTP connection.
+
+    Returns the indexes of the sent and the failed payloads, so the caller
+    can resend only the failures.
+    """
+    batch = [create_message(**message) for message in messages]
+
+    sent, failed = run_in_worker_loop(smtp_pool.send_messages(batch))
+    print("Emails sent: %s, failed: %s" % (len(sent), len(failed)))
+    return {"sent": sent, "failed": sorted(failed)}
+
+
+async def send_outbox_emails(session: AsyncSession, uids: list[str]) -> int:
+    """Send claimed outbox emails, recording each one's outcome on its row.
+
+    Only rows still marked dispatched are sent, so a redelivered claim skips
+    what an earlier delivery already sent, and the row locks stop two
+    deliveries of the same claim from both sending it.
+    """
+    statement = (
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.uid.in_([UUID(uid) for uid in uids]),
+            EmailOutbox.status == "dispatched",
+        )
+        .with_for_update(skip_locked=True)
+    )
+    emails = (await session.exec(statement)).all()
+    if not emails:
+        await session.rollback()
+        return 0
+
+    messages = [
+        create_message(email.recipients, email.subject, email.body) for email in emails
+    ]
+    try:
+        sent, failed = await smtp_pool.send_messages(messages)
+    except Exception as e:
+        logging.warning(f"Could not send outbox emails: {e!r}")
+        sent, failed = [], {index: e for index in range(len(emails))}
+
+    now = datetime.now()
+    for index in sent:
+        emails[index].status = "sent"
+    for index, error in failed.items():
+        emails[index].schedule_retry(repr(error), now)
+    await session.commit()
+    return len(sent)
+
+
+@c_app.task()
+def deliver_outbox_emails(uids: list[str]):
+    """Send outbox emails claimed by a drainer"""
+
+    async def deliver():
+        async with async_session_maker() as session:
+            return await send_outbox_emails(session, uids)
+
+    sent = run_in_worker_loop(deliver())
+    print("Outbox emails sent: %s of %s" % (sent, len(uids)))
+    return sent
+
+
+@c_app.task()
+def repair_rating_aggregates():
+    """Fix any drift between the books' rating aggregates and their reviews"""
+
+    async def repair():
+        async with async_session_maker() as session:
+            return await recompute_rating_aggregates(session)
+
+    repaired = run_in_worker_loop(repair())
+    print("Books with repaired rating aggregates: %s" % repaired)
+    return repaired
+
+
+async def publish_task(task, args: tuple) -> None:
+    """Publish a Celery task from async code without blocking the event loop"""
+    # retry=False stops kombu from retrying the publish for seconds. The
+    # thread may still finish after the timeout; a duplicate email is
+    # preferred over a lost one.
+    start_time = time.perf_counter()
+    result = "error"
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(task.apply_async, args, retry=False),
+            timeout=Config.EMAIL_ENQUEUE_TIMEOUT,
+        )
+        result = "ok"
+    finally:
+        EMAIL_ENQUEUE_LATENCY.labels(result).observe(time.perf_counter() - start_time)
+
+
+class EmailDispatcher:
+    """Hands emails to Celery without blocking the request path.
+
+    Handlers only put the email on a bounded in-process queue. A background
+    task publishes it to the broker in a thread with a timeout. After
+    repeated broker failures the circuit opens, and emails go straight to
+    the local fallback (sending from this process) until the cooldown ends.
+    """
+
+    def __init__(self) -> None:
+        self.queue: Optional[asyncio.Queue] = None
+        self.failures = 0
+        self.open_until = 0.0
+
+    def start(self) -> asyncio.Task:
+        self.queue = asyncio.Queue(maxsize=Config.EMAIL_QUEUE_SIZE)
+        return asyncio.create_task(self._drain())
+
+    @property
+    def broker_available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    def enqueue(
+        self,
+        recipients: list[str],
+        subject: str,
+        body: str,
+        background_tasks: BackgroundTasks,
+    ) -> None:
+        if self.queue is not None and self.broker_available:
+            try:
+                self.queue.put_nowait((recipients, subject, body))
+                return
+            except asyncio.QueueFull:
+                logging.warning("Email queue is full, sending locally")
+
+        message = create_message(recipients, subject, body)
+        background_tasks.add_task(mail.send_message, message)
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= Config.EMAIL_BREAKER_THRESHOLD:
+            self.open_until = time.monotonic() + Config.EMAIL_BREAKER_COOLDOWN
+
+    async def _drain(self) -> None:
+        while True:
+            recipients, subject, body = await self.queue.get()
+            try:
+                if self.broker_available:
+                    try:
+                        await publish_task(send_email, (recipients, subject, body))
+                        self.failures = 0
+                        continue
+                    except Exception as e:
+                        logging.warning(f"Could not enqueue email: {e!r}")
+                        self._record_failure()
+
+                message = create_message(recipients, subject, body)
+                await mail.send_message(message)
+            except Exception as e:
+                logging.exception(f"Error sending email: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+
+email_dispatcher = EmailDispatcher()
@@ -19,6 +19,43 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     DOMAIN: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    BLOCKLIST_FILTER_CAPACITY: int = 100000
+    BLOCKLIST_FILTER_ERROR_RATE: float = 0.001
+    BLOCKLIST_SYNC_INTERVAL: int = 60
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 3600
+    INVALID_TOKEN_CACHE_TTL: int = 30
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_LOCAL_TTL: int = 30
+    USER_CACHE_TTL: int = 300
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_ENQUEUE_TIMEOUT: float = 1
+    EMAIL_BREAKER_THRESHOLD: int = 3
+    EMAIL_BREAKER_COOLDOWN: int = 30
+    SMTP_POOL_SIZE: int = 4
+    SMTP_HEALTHCHECK_AFTER: int = 30
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 2
+    OUTBOX_RETRY_DELAY: int = 30
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_DELIVERY_TIMEOUT: int = 300
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    DEBUG: bool = False
+    N_PLUS_ONE_THRESHOLD: int = 5
+    RESPONSE_CACHE_TTL: int = 30
+    RESPONSE_CACHE_STALE_TTL: int = 60
+    RESPONSE_CACHE_LOCK_MS: int = 1000
+    RATING_PRIOR_MEAN: float = 3.0
+    RATING_PRIOR_WEIGHT: int = 10
+    RATING_REPAIR_INTERVAL: int = 86400
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -39,3 +76,11 @@ print("Config: %s" % Config.REDIS_URL)
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+
+# celery -A src.celery_tasks.c_app beat --loglevel=INFO
+beat_schedule = {
+    "repair-rating-aggregates": {
+        "task": "src.celery_tasks.repair_rating_aggregates",
+        "schedule": Config.RATING_REPAIR_INTERVAL,
+    },
+}
@@ -0,0 +1,74 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import Config
+from src.metrics import DB_QUERY_DURATION
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_placeholders = re.compile(r"\$\d+|%\(\w+\)s|:\w+|\?")
+_in_lists = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape so repeats with other values match"""
+    statement = _literals.sub("?", statement)
+    statement = _placeholders.sub("?", statement)
+    statement = _in_lists.sub("(?)", statement)
+    return _whitespace.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """SQL statements and database time spent while serving one request"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+
+        normalized = normalize_statement(statement)
+        self.statements[normalized] += 1
+        if self.statements[normalized] == Config.N_PLUS_ONE_THRESHOLD + 1:
+            logging.warning(
+                f"Possible N+1 query: ran more than {Config.N_PLUS_ONE_THRESHOLD} "
+                f"times in one request: {normalized}"
+            )
+
+
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERY_DURATION.observe(duration)
+
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+    @event.listens_for(engine, "handle_error")
+    def discard_query_timer(context):
+        # after_cursor_execute never runs for a statement that failed
+        if context.execution_context is not None and context.connection is not None:
+            timers = context.connection.info.get("query_start_time")
+            if timers:
+                timers.pop()
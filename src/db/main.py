@@ -1,14 +1,87 @@
-from sqlmodel import create_engine, text, SQLModel
-from sqlalchemy.ext.asyncio import AsyncEngine
+import time
+from sqlmodel import text, SQLModel
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config import Config
+from src.metrics import DB_POOL_CHECKOUT_WAIT
+from .instrumentation import instrument_engine
 from .models import Book
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 
-create_engine = create_engine(url=Config.DATABASE_URL)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait to check out a connection"""
 
-async_engine = AsyncEngine(create_engine)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start_time
+            self.checkouts += 1
+            self.total_wait += wait_time
+            self.max_wait = max(self.max_wait, wait_time)
+            DB_POOL_CHECKOUT_WAIT.observe(wait_time)
+
+
+def get_engine_options(database_url: str) -> dict:
+    if database_url.startswith("sqlite"):
+        return {}
+
+    options = dict(
+        poolclass=TimedQueuePool,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+    )
+    if "+asyncpg" in database_url:
+        options["connect_args"] = {
+            "prepared_statement_cache_size": Config.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+async_engine = create_async_engine(
+    Config.DATABASE_URL, **get_engine_options(Config.DATABASE_URL)
+)
+
+instrument_engine(async_engine.sync_engine)
+
+
+async_session_maker = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+def get_pool_stats() -> dict:
+    pool = async_engine.pool
+    stats = {"status": pool.status()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            total_wait_seconds=pool.total_wait,
+            avg_wait_seconds=(
+                pool.total_wait / pool.checkouts if pool.checkouts else 0.0
+            ),
+            max_wait_seconds=pool.max_wait,
+        )
+    return stats
 
 
 async def init_db():
@@ -22,9 +95,10 @@ async def drop_db():
 
 
 async def get_session() -> AsyncSession:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
-
-    async with Session() as session:
+    async with async_session_maker() as session:
         yield session
+
+
+def get_session_maker() -> sessionmaker:
+    """For work that outlives the request session, e.g. streamed or shared reads"""
+    return async_session_maker
@@ -1,8 +1,10 @@
-from sqlmodel import SQLModel, Field, Column, Relationship
-from datetime import datetime, date
+from sqlmodel import SQLModel, Field, Column, Relationship, Index
+from datetime import datetime, date, timedelta
 from uuid import UUID, uuid4
 import sqlalchemy.dialects.postgresql as pg
+import sqlalchemy as sa
 from typing import Optional, List
+from src.config import Config
 
 
 class User(SQLModel, table=True):
@@ -11,7 +13,7 @@ class User(SQLModel, table=True):
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid4)
     )
     username: str
-    email: str
+    email: str = Field(unique=True, index=True)
     first_name: str
     last_name: str
     role: str = Field(
@@ -22,10 +24,10 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
@@ -34,6 +36,11 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_rating_score_uid", "rating_score", "uid"),
+    )
 
     uid: UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid4)
@@ -45,11 +52,22 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_uid: Optional[UUID] = Field(default=None, foreign_key="users.uid")
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    # Rating aggregates, kept in step with the reviews table by ReviewService
+    # and repaired in bulk by src.books.ratings.recompute_rating_aggregates
+    review_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_1: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_2: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_3: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_4: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_5: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_score: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     user: Optional["User"] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
@@ -58,13 +76,18 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_uid_created_at", "book_uid", "created_at"),
+    )
 
     uid: UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid4)
     )
-    book_uid: Optional[UUID] = Field(default=None, foreign_key="books.uid")
+    book_uid: Optional[UUID] = Field(
+        default=None, foreign_key="books.uid", ondelete="SET NULL"
+    )
     user_uid: Optional[UUID] = Field(default=None, foreign_key="users.uid")
-    rating: int = Field(lt=5, gt=0)
+    rating: int = Field(ge=1, le=5)
     review_text: str
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
@@ -75,6 +98,45 @@ class Review(SQLModel, table=True):
         return f"<Review for book {self.book_uid} by user {self.user_uid}>"
 
 
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_available_at", "status", "available_at"),
+    )
+
+    uid: UUID = Field(
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid4)
+    )
+    recipients: List[str] = Field(sa_column=Column(sa.JSON, nullable=False))
+    subject: str
+    body: str
+    status: str = Field(default="pending")
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    available_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    dispatched_at: Optional[datetime] = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=True)
+    )
+
+    def schedule_retry(self, error: str, now: datetime) -> None:
+        """Put the email back in the queue with a linear backoff"""
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+            self.status = "failed"
+        else:
+            self.status = "pending"
+        self.available_at = now + timedelta(
+            seconds=Config.OUTBOX_RETRY_DELAY * self.attempts
+        )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.subject} to {self.recipients}>"
+
+
 # Any db model changes we do then we need to make sure to run the migrations
 """
 #Command to run migrations
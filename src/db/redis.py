@@ -1,17 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict
+
 import redis.asyncio as aioredis
 
 from src.config import Config
+from src.metrics import REDIS_BLOCKLIST_LATENCY
+from .bloom import BloomFilter
 
 JTI_EXPIRY = 3600
 
+REVOKED_JTIS_KEY = "bookly:revoked_jtis"
+REVOKED_JTIS_CHANNEL = "bookly:revoked_jtis"
+
 token_blocklist = aioredis.from_url(Config.REDIS_URL)
 
 
+class RevokedTokenFilter:
+    """In-process bloom filter of revoked JTIs kept in front of Redis.
+
+    A miss means the token was never revoked, so Redis is only asked about
+    filter hits. Until the filter has been loaded from Redis (or after the
+    pub/sub connection drops) it is not ready and every check goes to Redis.
+    """
+
+    def __init__(self) -> None:
+        self.bloom = self._new_bloom()
+        self.loaded = False
+        self.subscribed = False
+        self.rebuilding = False
+        self.added_during_rebuild = set()
+        self.rebuild_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded and self.subscribed
+
+    def _new_bloom(self) -> BloomFilter:
+        return BloomFilter(
+            Config.BLOCKLIST_FILTER_CAPACITY, Config.BLOCKLIST_FILTER_ERROR_RATE
+        )
+
+    def add(self, jti: str) -> None:
+        self.bloom.add(jti)
+        if self.rebuilding:
+            self.added_during_rebuild.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        return not self.ready or jti in self.bloom
+
+    async def rebuild(self) -> None:
+        # Rebuilding from the sorted set also drops JTIs whose tokens expired
+        async with self.rebuild_lock:
+            self.rebuilding = True
+            try:
+                now = time.time()
+                await token_blocklist.zremrangebyscore(REVOKED_JTIS_KEY, "-inf", now)
+                revoked = await token_blocklist.zrangebyscore(
+                    REVOKED_JTIS_KEY, now, "+inf"
+                )
+
+                bloom = self._new_bloom()
+                for jti in revoked:
+                    bloom.add(jti.decode())
+                for jti in self.added_during_rebuild:
+                    bloom.add(jti)
+                self.bloom = bloom
+                self.loaded = True
+            finally:
+                self.rebuilding = False
+                self.added_during_rebuild = set()
+
+
+revoked_tokens = RevokedTokenFilter()
+
+pubsub_handlers: Dict[str, Callable[[str], None]] = {
+    REVOKED_JTIS_CHANNEL: revoked_tokens.add,
+}
+
+
+def subscribe(channel: str, handler: Callable[[str], None]) -> None:
+    pubsub_handlers[channel] = handler
+
+
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+    with REDIS_BLOCKLIST_LATENCY.labels("add").time():
+        async with token_blocklist.pipeline(transaction=False) as pipe:
+            pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+            pipe.zadd(REVOKED_JTIS_KEY, {jti: time.time() + JTI_EXPIRY})
+            pipe.publish(REVOKED_JTIS_CHANNEL, jti)
+            await pipe.execute()
+
+    revoked_tokens.add(jti)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
+    if not revoked_tokens.might_contain(jti):
+        return False
+
+    with REDIS_BLOCKLIST_LATENCY.labels("check").time():
+        jti = await token_blocklist.get(jti)
 
     return jti is not None
+
+
+async def listen_for_invalidations() -> None:
+    """Apply pub/sub messages from other workers, reconnecting on failure"""
+    while True:
+        pubsub = token_blocklist.pubsub()
+        try:
+            await pubsub.subscribe(*pubsub_handlers)
+            # Load the filter only once subscribed so no revocation is missed
+            await revoked_tokens.rebuild()
+            revoked_tokens.subscribed = True
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                handler = pubsub_handlers.get(message["channel"].decode())
+                if handler:
+                    handler(message["data"].decode())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Redis pub/sub listener failed: {str(e)}")
+            revoked_tokens.subscribed = False
+            await asyncio.sleep(Config.BLOCKLIST_SYNC_INTERVAL)
+        finally:
+            await pubsub.aclose()
+
+
+async def sync_revoked_tokens() -> None:
+    """Periodically rebuild the filter to prune expired JTIs and repair drift"""
+    while True:
+        await asyncio.sleep(Config.BLOCKLIST_SYNC_INTERVAL)
+        try:
+            await revoked_tokens.rebuild()
+        except Exception as e:
+            logging.warning(f"Revoked token sync failed: {str(e)}")
+            revoked_tokens.loaded = False
+
+
+def start_redis_sync() -> list[asyncio.Task]:
+    return [
+        asyncio.create_task(listen_for_invalidations()),
+        asyncio.create_task(sync_revoked_tokens()),
+    ]
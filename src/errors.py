@@ -53,12 +53,30 @@ class InsufficientPermission(BooklyException):
     pass
 
 
+class ServiceBusy(BooklyException):
+    """Too many requests are waiting on a limited resource, e.g. password hashing"""
+
+    pass
+
+
 class BookNotFound(BooklyException):
     """Book Not found"""
 
     pass
 
 
+class PreconditionFailed(BooklyException):
+    """User has sent an If-Match version that no longer matches the book"""
+
+    pass
+
+
+class InvalidCursor(BooklyException):
+    """User has provided a malformed pagination cursor"""
+
+    pass
+
+
 class TagNotFound(BooklyException):
     """Tag Not found"""
 
@@ -126,6 +144,16 @@ def register_all_errors(app: FastAPI):
             },
         ),
     )
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
     app.add_exception_handler(
         InvalidCredentials,
         create_exception_handler(
@@ -190,6 +218,17 @@ def register_all_errors(app: FastAPI):
             },
         ),
     )
+    app.add_exception_handler(
+        ServiceBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy",
+                "resolution": "Please try again in a few seconds",
+                "error_code": "service_busy",
+            },
+        ),
+    )
     app.add_exception_handler(
         TagNotFound,
         create_exception_handler(
@@ -220,6 +259,18 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        PreconditionFailed,
+        create_exception_handler(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            initial_detail={
+                "message": "Book has been modified by someone else",
+                "resolution": "Please fetch the latest version and try again",
+                "error_code": "precondition_failed",
+            },
+        ),
+    )
+
     app.add_exception_handler(
         AccountNotVerified,
         create_exception_handler(
@@ -0,0 +1,46 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from src.serializers import FastJSONResponse
+from src.errors import PreconditionFailed
+
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def if_match_versions(request: Request) -> Optional[list[int]]:
+    """Returns the row versions listed in If-Match, or None if any version will do"""
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    try:
+        return [int(tag.strip().strip('"')) for tag in header.split(",")]
+    except ValueError:
+        # an ETag we never issued cannot match the current version
+        raise PreconditionFailed()
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def json_response(request: Request, body: bytes, etag: str = None) -> Response:
+    """Returns the JSON body with a strong ETag, or 304 if the client already has it"""
+    etag = etag or content_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(body, headers={"ETag": etag})
@@ -1,6 +1,14 @@
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
+from fastapi_mail.msg import MailMsg
 from src.config import Config
 from pathlib import Path
+from contextlib import asynccontextmanager
+from email.utils import formataddr
+from typing import Optional
+import aiosmtplib
+import asyncio
+import logging
+import time
 
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -32,3 +40,124 @@ def create_message(recipients: list[str], subject: str, body: str):
     )
 
     return message
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP sessions open between sends.
+
+    FastMail.send_message opens, logs in and quits a connection for every
+    message. The pool hands out idle connections instead, checks with NOOP
+    any that sat idle too long, and reconnects when the server hung up.
+    All methods must run on the same event loop.
+    """
+
+    def __init__(self, config: ConnectionConfig, size: int) -> None:
+        self.config = config
+        self.size = size
+        self.idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self.slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+        )
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(
+                self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value()
+            )
+        return smtp
+
+    async def _is_healthy(self, smtp: aiosmtplib.SMTP, last_used: float) -> bool:
+        if not smtp.is_connected:
+            return False
+        if time.monotonic() - last_used < Config.SMTP_HEALTHCHECK_AFTER:
+            return True
+        try:
+            await smtp.noop()
+            return True
+        except aiosmtplib.SMTPException:
+            return False
+
+    async def _close(self, smtp: aiosmtplib.SMTP) -> None:
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self.idle:
+            smtp, last_used = self.idle.pop()
+            if await self._is_healthy(smtp, last_used):
+                return smtp
+            await self._close(smtp)
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self):
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.size)
+
+        async with self.slots:
+            smtp = await self._acquire()
+            try:
+                yield smtp
+            except Exception:
+                await self._close(smtp)
+                raise
+            else:
+                self.idle.append((smtp, time.monotonic()))
+
+    async def _build(self, message: MessageSchema):
+        sender = formataddr((self.config.MAIL_FROM_NAME, self.config.MAIL_FROM))
+        return await MailMsg(message)._message(sender)
+
+    async def _reconnect(self, smtp: aiosmtplib.SMTP) -> None:
+        smtp.close()
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(
+                self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value()
+            )
+
+    async def send_messages(
+        self, messages: list[MessageSchema]
+    ) -> tuple[list[int], dict[int, Exception]]:
+        """Send messages over one pooled connection.
+
+        Returns the indexes of the messages that were sent and the error for
+        each one that was not, so callers can retry just the failures.
+        """
+        if self.config.SUPPRESS_SEND:
+            return list(range(len(messages))), {}
+
+        sent, failed = [], {}
+        async with self.connection() as smtp:
+            for index, message in enumerate(messages):
+                try:
+                    mime_message = await self._build(message)
+                    try:
+                        await smtp.send_message(mime_message)
+                    except aiosmtplib.SMTPServerDisconnected:
+                        # The server dropped us mid batch: reconnect and retry once
+                        await self._reconnect(smtp)
+                        await smtp.send_message(mime_message)
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logging.warning(f"Could not send email {index}: {e!r}")
+                    failed[index] = e
+                    continue
+                sent.append(index)
+        return sent, failed
+
+    async def close(self) -> None:
+        while self.idle:
+            smtp, _ = self.idle.pop()
+            await self._close(smtp)
+
+
+smtp_pool = SMTPConnectionPool(mail_config, size=Config.SMTP_POOL_SIZE)
@@ -5,31 +5,46 @@ Git code: https://github.com/jod35/fastapi-beyond-CRUD/blob/main/src/__init__.py
 """
 
 from fastapi import FastAPI
+import asyncio
 
 from .auth import authRoute
 from .books import booksRoute
 from .reviews import reviewsRoute
 from contextlib import asynccontextmanager
-from src.db.main import init_db
+from src.db.main import get_pool_stats
+from src.db.redis import start_redis_sync
+from src.auth.utils import token_cache
+from src.auth.cache import user_cache
+from src.books.booksRoute import book_detail_flight
+from src.celery_tasks import email_dispatcher
+from src.outbox import run_outbox_drainer
 from fastapi.openapi.utils import get_openapi
+from prometheus_client import make_asgi_app
 from .errors import register_all_errors
-from .middleware import register_middleware
+from .middleware import register_middleware, start_access_log, stop_access_log
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
     print("Server is starting ...")
+    background_tasks = []
+    access_log = start_access_log()
     try:
-        await init_db()
+        # The schema is managed by the Alembic migrations, not created here
+        background_tasks = start_redis_sync()
+        background_tasks.append(email_dispatcher.start())
+        background_tasks.append(asyncio.create_task(run_outbox_drainer()))
         yield
     finally:
-        pass
+        for task in background_tasks:
+            task.cancel()
+        stop_access_log(access_log)
     print("Server is shutting down...")
 
 
 version = "v1"
 
-app = FastAPI()
+app = FastAPI(lifespan=life_span)
 
 
 def custom_openapi():
@@ -75,6 +90,22 @@ def read_root():
     return {"Hello": "World"}
 
 
+@app.get("/health/db-pool")
+def db_pool_stats():
+    return get_pool_stats()
+
+
+@app.get("/health/caches")
+def cache_stats():
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "book_detail_flight": book_detail_flight.stats(),
+    }
+
+
+app.mount("/metrics", make_asgi_app())
+
 app.include_router(booksRoute.router, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(authRoute.router, prefix=f"/api/{version}/user", tags=["users"])
 app.include_router(
@@ -0,0 +1,45 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "bookly_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "bookly_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "bookly_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+DB_QUERY_DURATION = Histogram(
+    "bookly_db_query_duration_seconds",
+    "Duration of SQL statements sent to the database",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+REDIS_BLOCKLIST_LATENCY = Histogram(
+    "bookly_redis_blocklist_duration_seconds",
+    "Latency of Redis calls made for the token blocklist",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "bookly_password_hash_duration_seconds",
+    "Time spent in bcrypt, excluding time queued for the executor",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1, 2.5),
+)
+EMAIL_ENQUEUE_LATENCY = Histogram(
+    "bookly_email_enqueue_duration_seconds",
+    "Time taken to publish email tasks to the Celery broker",
+    ["result"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "bookly_singleflight_calls_total",
+    "Reads that started a shared call (leader) or joined one in flight (coalesced)",
+    ["name", "result"],
+)
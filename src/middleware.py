@@ -2,28 +2,159 @@ from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from logging.handlers import QueueHandler, QueueListener
+import json
+import queue
+import random
+import sys
 import time
 import logging
 from src.config import Config
+from src.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+from src.db.instrumentation import QueryStats, request_query_stats
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True  # To disable logging
 
+access_logger = logging.getLogger("bookly.access")
+access_logger.setLevel(logging.INFO)
+access_logger.propagate = False
 
-def register_middleware(app: FastAPI):
 
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
+class JSONAccessFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({"timestamp": record.created, **record.access})
+
+
+def start_access_log() -> QueueListener:
+    """Write access records from a background thread instead of the event loop"""
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONAccessFormatter())
+
+    listener = QueueListener(log_queue, handler)
+    access_logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def stop_access_log(listener: QueueListener) -> None:
+    for handler in list(access_logger.handlers):
+        access_logger.removeHandler(handler)
+    listener.stop()
+
+
+class AccessLogMiddleware:
+    """Pure ASGI access log; records a sample of requests as JSON"""
+
+    def __init__(self, app, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not access_logger.handlers:
+            return await self.app(scope, receive, send)
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter_ns()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_and_measure(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            access_logger.info(
+                "access",
+                extra={
+                    "access": {
+                        "method": scope["method"],
+                        "route": getattr(route, "path", scope["path"]),
+                        "status": status_code,
+                        "duration_ns": time.perf_counter_ns() - start_time,
+                        "response_bytes": response_bytes,
+                    }
+                },
+            )
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding the request latency and in-flight metrics"""
+
+    def __init__(self, app) -> None:
+        self.app = app
 
-        print("before", start_time)
-        response = await call_next(request)
-        processing_time = time.time() - start_time
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        message = f"{request.method}:{request.url.path} - {response.status_code} completed after {processing_time}"
+        start_time = time.perf_counter()
+        status_code = 500
+        in_flight = REQUESTS_IN_FLIGHT.labels(scope["method"])
+        in_flight.inc()
 
-        print("message:: ", message)
-        return response
+        async def send_and_record_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            in_flight.dec()
+            # Unmatched paths share one label to keep cardinality bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"], getattr(route, "path", "unmatched"), status_code
+            ).observe(time.perf_counter() - start_time)
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL statements each request runs.
+
+    With DEBUG on, the count and total database time are sent back in a
+    Server-Timing header, which browser dev tools show per request.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+
+        async def send_with_server_timing(message):
+            if message["type"] == "http.response.start" and Config.DEBUG:
+                timing = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            request_query_stats.reset(token)
+
+
+def register_middleware(app: FastAPI):
 
     app.add_middleware(
         CORSMiddleware,
@@ -38,6 +169,12 @@ def register_middleware(app: FastAPI):
         allowed_hosts=["localhost", "127.0.0.1", "bookly-fasapi-radix.onrender.com"],
     )
 
+    app.add_middleware(QueryStatsMiddleware)
+
+    app.add_middleware(MetricsMiddleware)
+
+    app.add_middleware(AccessLogMiddleware, sample_rate=Config.ACCESS_LOG_SAMPLE_RATE)
+
     # @app.middleware("http")
     # async def authorization(request: Request, call_next):
     #     print("authorization: ", request.url.path)
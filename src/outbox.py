@@ -0,0 +1,105 @@
+"""
+Transactional email outbox.
+
+Request handlers write the email to the email_outbox table in the same
+transaction as the change that triggered it, so an email is never lost
+once the request commits and the request never waits on the broker.
+Drainers claim pending rows in batches with FOR UPDATE SKIP LOCKED and hand
+their ids to the deliver_outbox_emails Celery task, so more drainers (one
+per app worker) means more throughput. A row is only marked sent once the
+worker has sent that message; failed ones are retried with a backoff, and
+claims the worker never confirms are picked up again after
+OUTBOX_DELIVERY_TIMEOUT.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_session_maker
+from src.db.models import EmailOutbox
+from src.celery_tasks import deliver_outbox_emails, publish_task
+
+drainer_wakeup: Optional[asyncio.Event] = None
+
+
+def add_email_to_outbox(
+    session: AsyncSession, recipients: list[str], subject: str, body: str
+) -> EmailOutbox:
+    """Stage an email in the caller's transaction; it is sent after commit"""
+    email = EmailOutbox(recipients=recipients, subject=subject, body=body)
+    session.add(email)
+    return email
+
+
+def wake_outbox_drainer() -> None:
+    if drainer_wakeup is not None:
+        drainer_wakeup.set()
+
+
+async def drain_outbox(session: AsyncSession) -> int:
+    now = datetime.now()
+    # Dispatched rows whose delivery was not confirmed in time are claimed again
+    statement = (
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.status.in_(["pending", "dispatched"]),
+            EmailOutbox.available_at <= now,
+        )
+        .order_by(EmailOutbox.available_at)
+        .limit(Config.OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.exec(statement)
+    emails = result.all()
+    if not emails:
+        await session.rollback()
+        return 0
+
+    # Commit the claim before publishing, so the worker finds the rows
+    # dispatched and unlocked however soon it picks up the task
+    for email in emails:
+        email.status = "dispatched"
+        email.dispatched_at = now
+        email.available_at = now + timedelta(seconds=Config.OUTBOX_DELIVERY_TIMEOUT)
+    await session.commit()
+
+    try:
+        await publish_task(
+            deliver_outbox_emails, ([str(email.uid) for email in emails],)
+        )
+    except Exception as e:
+        logging.warning(f"Could not hand outbox emails to the broker: {e!r}")
+        for email in emails:
+            email.schedule_retry(repr(e), now)
+        await session.commit()
+
+    return len(emails)
+
+
+async def run_outbox_drainer() -> None:
+    global drainer_wakeup
+
+    drainer_wakeup = asyncio.Event()
+    while True:
+        try:
+            async with async_session_maker() as session:
+                drained = await drain_outbox(session)
+        except Exception as e:
+            logging.exception(f"Outbox drainer failed: {str(e)}")
+            drained = 0
+
+        # A full batch means there is probably more waiting
+        if drained < Config.OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(
+                    drainer_wakeup.wait(), timeout=Config.OUTBOX_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            drainer_wakeup.clear()
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from uuid import UUID
 from src.db.models import User
 from src.db.main import get_session
 from .schemas import ReviewModelCreate
@@ -13,7 +14,7 @@ review_service = ReviewService()
 
 @router.post("/book/{book_id}")
 async def add_review_to_book(
-    book_id: str,
+    book_id: UUID,
     review_data: ReviewModelCreate,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
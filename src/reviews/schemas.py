@@ -18,5 +18,5 @@ class ReviewModel(ReviewBaseModel):
 
 
 class ReviewModelCreate(BaseModel):
-    rating: int = Field(..., description="Rating")
+    rating: int = Field(..., ge=1, le=5, description="Rating")
     review_text: str = Field(..., description="Review Text")
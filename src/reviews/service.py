@@ -1,9 +1,10 @@
-from src.db.models import Review
+from src.db.models import Book, Review
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, update
 from .schemas import ReviewModelCreate
 from datetime import datetime
-from src.books.service import BookService
+from src.books.cache import response_cache
+from src.books.ratings import rating_update_values
 from src.auth.service import UserService
 from src.auth.dependencies import AccessTokenBearer
 from fastapi import Depends, HTTPException, status
@@ -11,7 +12,6 @@ from uuid import UUID
 import logging
 
 user_service = UserService()
-book_service = BookService()
 
 
 class ReviewService:
@@ -32,8 +32,19 @@ class ReviewService:
     ):
         try:
             user = await user_service.get_user_by_email(user_email, session)
-            book = await book_service.get_book_by_id(book_uid, session)
-            if not book:
+            # updates the book's rating aggregates and version in the same
+            # transaction as the review, and checks the book exists
+            result = await session.exec(
+                update(Book)
+                .where(Book.uid == book_uid)
+                .values(
+                    version=Book.version + 1,
+                    **rating_update_values(review_data.rating),
+                )
+                .returning(Book.uid)
+            )
+            book_uid = result.scalar()
+            if not book_uid:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Book not found",
@@ -46,12 +57,11 @@ class ReviewService:
                 )
 
             review = Review(**review_data.model_dump())
-            # review.user_uid = user.uid
-            # review.book_uid = book.uid
-            review.user = user
-            review.book = book
+            review.user_uid = user.uid
+            review.book_uid = book_uid
             session.add(review)
             await session.commit()
+            await response_cache.invalidate("books", f"book:{book_uid}")
             return review
         except Exception as e:
             logging.exception(f"Error: {str(e)}")
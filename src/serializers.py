@@ -0,0 +1,85 @@
+"""
+Serializers that turn ORM rows straight into JSON bytes for the read-heavy
+routes. They read only the attributes the response schemas declare and skip
+validating rows that came out of our own database, so a route returning
+their output in a FastJSONResponse bypasses response_model validation and
+jsonable_encoder entirely. The schemas are still declared on the routes for
+the OpenAPI docs.
+"""
+
+import orjson
+from fastapi import Response
+from src.books.schemas import BookModel
+from src.reviews.schemas import ReviewModel
+from src.auth.schemas import UserModel
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+
+def _fields(model) -> tuple:
+    return tuple(
+        name for name, field in model.model_fields.items() if not field.exclude
+    )
+
+
+BOOK_FIELDS = _fields(BookModel)
+REVIEW_FIELDS = _fields(ReviewModel)
+USER_FIELDS = _fields(UserModel)
+
+
+def _row(obj, fields: tuple) -> dict:
+    return {name: getattr(obj, name) for name in fields}
+
+
+def dump_book(book) -> bytes:
+    return orjson.dumps(_row(book, BOOK_FIELDS))
+
+
+def dump_books(books) -> bytes:
+    return orjson.dumps([_row(book, BOOK_FIELDS) for book in books])
+
+
+def dump_book_page(page: dict) -> bytes:
+    return orjson.dumps(
+        {
+            "items": [_row(book, BOOK_FIELDS) for book in page["items"]],
+            "next_cursor": page["next_cursor"],
+        }
+    )
+
+
+def dump_book_batch(books: list, missing: list) -> bytes:
+    return orjson.dumps(
+        {"items": [_row(book, BOOK_FIELDS) for book in books], "missing": missing}
+    )
+
+
+def dump_search_page(page: dict) -> bytes:
+    return orjson.dumps(
+        {
+            "items": [
+                {
+                    **_row(item["book"], BOOK_FIELDS),
+                    "rank": item["rank"],
+                    "highlights": item["highlights"],
+                }
+                for item in page["items"]
+            ],
+            "next_offset": page["next_offset"],
+        }
+    )
+
+
+def dump_book_detail(book) -> bytes:
+    data = _row(book, BOOK_FIELDS)
+    data["reviews"] = [_row(review, REVIEW_FIELDS) for review in book.reviews]
+    return orjson.dumps(data)
+
+
+def dump_user_books(user, books, reviews) -> bytes:
+    data = _row(user, USER_FIELDS)
+    data["books"] = [_row(book, BOOK_FIELDS) for book in books]
+    data["reviews"] = [_row(review, REVIEW_FIELDS) for review in reviews]
+    return orjson.dumps(data)
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+from src.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call
+
+    The first caller for a key starts the call as its own task. Anyone
+    asking for the same key before it finishes awaits that task instead of
+    starting another. The task is shielded, so a caller that disconnects
+    does not cancel the result everyone else is waiting for. That also means
+    the call must not depend on a request-scoped session.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self.calls.get(key)
+        if task is None:
+            self.leaders += 1
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        else:
+            self.coalesced += 1
+            SINGLEFLIGHT_CALLS.labels(self.name, "coalesced").inc()
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.calls),
+        }
@@ -1,9 +1,22 @@
-from src.db.main import get_session
+from src.db.main import get_session, get_session_maker
 from src.main import app
 from unittest.mock import Mock
+import asyncio
 import pytest
+from datetime import date
 from fastapi.testclient import TestClient
-from src.auth.dependencies import RoleChecker, AccessTokenBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.auth.dependencies import RoleChecker, AccessTokenBearer, get_token_payload
+from src.auth.cache import user_cache
+from src.books.cache import response_cache
+from src.db.models import User, Book, Review
+from src.config import Config
+from src.db.instrumentation import instrument_engine
 
 mock_session = Mock()
 mock_user_service = Mock()
@@ -42,3 +55,128 @@ def fake_book_service():
 @pytest.fixture
 def test_client():
     return TestClient(app)
+
+
+class SeededDatabase:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.session_maker = None
+        self.user = None
+        self.books = []
+
+    async def seed(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            self.user = User(
+                username="reader",
+                email="reader@bookly.com",
+                first_name="Book",
+                last_name="Reader",
+                role="user",
+                is_verified=True,
+                password_hash="not-a-real-hash",
+            )
+            session.add(self.user)
+            await session.flush()
+
+            # Every book starts with one 4-star review
+            prior = Config.RATING_PRIOR_WEIGHT * Config.RATING_PRIOR_MEAN
+            rating_score = (prior + 4) / (Config.RATING_PRIOR_WEIGHT + 1)
+            for i in range(3):
+                book = Book(
+                    title=f"Book {i}",
+                    author="Author",
+                    publisher="Publisher",
+                    published_date=date(2020, 1, i + 1),
+                    page_count=100 + i,
+                    language="English",
+                    user_uid=self.user.uid,
+                    review_count=1,
+                    rating_sum=4,
+                    rating_4=1,
+                    rating_score=rating_score,
+                )
+                session.add(book)
+                await session.flush()
+                session.add(
+                    Review(
+                        rating=4,
+                        review_text="Good read",
+                        book_uid=book.uid,
+                        user_uid=self.user.uid,
+                    )
+                )
+                self.books.append(book)
+            await session.commit()
+
+    def token_payload(self):
+        return {
+            "user": {
+                "uid": str(self.user.uid),
+                "email": self.user.email,
+                "role": self.user.role,
+            },
+            "jti": "test-jti",
+            "refresh": False,
+        }
+
+
+@pytest.fixture
+def seeded_db(tmp_path, monkeypatch):
+    """A seeded SQLite database wired into the app, recording every SQL statement"""
+    monkeypatch.setattr(user_cache, "enabled", False)
+    monkeypatch.setattr(response_cache, "enabled", False)
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'bookly.db'}", poolclass=NullPool
+    )
+    db = SeededDatabase(engine)
+    asyncio.run(db.seed())
+
+    instrument_engine(engine.sync_engine)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        db.statements.append(statement)
+
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    db.session_maker = Session
+
+    async def get_test_session():
+        async with Session() as session:
+            yield session
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_session_maker] = lambda: Session
+    app.dependency_overrides[get_token_payload] = db.token_payload
+
+    yield db
+
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(overrides)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def db_client(seeded_db):
+    return TestClient(app, base_url="http://localhost")
+
+
+@pytest.fixture
+def query_budget(seeded_db, db_client):
+    """Call an endpoint and fail if it runs more SQL statements than allowed"""
+
+    def request(method, url, max_queries, **kwargs):
+        seeded_db.statements.clear()
+        response = db_client.request(method, url, **kwargs)
+        used = len(seeded_db.statements)
+        assert used <= max_queries, (
+            f"{method} {url} ran {used} queries, budget is {max_queries}:\n"
+            + "\n".join(seeded_db.statements)
+        )
+        return response
+
+    return request
@@ -1,4 +1,13 @@
+import asyncio
+import pytest
+from datetime import datetime
+from uuid import uuid4
+from src.auth import utils
+from src.auth.cache import UserCache
 from src.auth.schemas import UserCreateModel
+from src.auth.utils import create_access_token, decode_token, token_cache
+from src.db.models import User
+from src.errors import ServiceBusy
 
 auth_prefix = f"/api/v1/user"
 
@@ -29,3 +38,63 @@ def test_user_creation(fake_session, fake_user_service, test_client):
     assert fake_user_service.create_user_called_once()
     assert fake_user_service.create_user_called_once_with(user_data, fake_session)
     # assert response.status_code == 201
+
+
+def test_password_hashing_runs_off_the_event_loop(monkeypatch):
+    async def hash_and_verify():
+        password_hash = await utils.generate_hash_password_async("secret")
+        return await utils.verify_password_async("secret", password_hash)
+
+    assert asyncio.run(hash_and_verify())
+
+    max_pending = utils.Config.PASSWORD_HASH_MAX_PENDING
+    monkeypatch.setattr(utils, "pending_password_jobs", max_pending)
+    with pytest.raises(ServiceBusy):
+        asyncio.run(utils.verify_password_async("secret", "hash"))
+
+
+def test_decode_token_caches_valid_and_invalid_tokens():
+    token_cache.clear()
+    token = create_access_token(user_data={"email": "test111@test.com"})
+
+    assert decode_token(token) is decode_token(token)
+    assert decode_token("not-a-token") is None
+    assert decode_token("not-a-token") is None
+    assert token_cache.stats()["hits"] >= 2
+
+
+def test_user_cache_returns_detached_copies():
+    user = User(
+        uid=uuid4(),
+        username="test111",
+        email="test111@test.com",
+        first_name="string",
+        last_name="string",
+        role="user",
+        is_verified=True,
+        password_hash="hash",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    cache = UserCache()
+
+    async def round_trip():
+        await cache.set(user, await cache.generation(user.email))
+        cached = await cache.get(user.email)
+        await cache.invalidate(user.email)
+        return cached
+
+    cached = asyncio.run(round_trip())
+    assert cached is not user
+    assert (cached.uid, cached.is_verified) == (user.uid, True)
+    assert cached.password_hash is None
+    assert cache.local.get(user.email) is None
+
+    async def racing_fill():
+        # The row was read before an update invalidated the user
+        generation = await cache.generation(user.email)
+        await cache.invalidate(user.email)
+        await cache.set(user, generation)
+
+    asyncio.run(racing_fill())
+    assert cache.local.get(user.email) is None
@@ -0,0 +1,40 @@
+import asyncio
+from uuid import uuid4
+from src.db import redis
+from src.db.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    jtis = [str(uuid4()) for _ in range(1000)]
+    for jti in jtis:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in jtis)
+    false_positives = sum(str(uuid4()) in bloom for _ in range(1000))
+    assert false_positives < 50
+
+
+def test_filter_miss_skips_redis(monkeypatch):
+    revoked = redis.RevokedTokenFilter()
+    revoked.loaded = revoked.subscribed = True
+    revoked.add("revoked-jti")
+    monkeypatch.setattr(redis, "revoked_tokens", revoked)
+
+    calls = []
+
+    async def get(jti):
+        calls.append(jti)
+        return b"" if jti == "revoked-jti" else None
+
+    monkeypatch.setattr(redis.token_blocklist, "get", get)
+
+    assert asyncio.run(redis.token_in_blocklist("revoked-jti"))
+    assert not asyncio.run(redis.token_in_blocklist(str(uuid4())))
+    assert calls == ["revoked-jti"]
+
+
+def test_unready_filter_always_asks_redis():
+    revoked = redis.RevokedTokenFilter()
+    revoked.loaded = True
+    assert revoked.might_contain(str(uuid4()))
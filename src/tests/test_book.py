@@ -1,3 +1,12 @@
+import csv
+import json
+from datetime import date, datetime
+from uuid import uuid4
+from src.db.models import Book, Review
+from src.books.schemas import BookDetailModel, BookPageModel
+from src.books.utils import encode_cursor, decode_cursor
+from src.serializers import dump_book_detail, dump_book_page
+
 books_prefix = f"/api/v1/books"
 
 
@@ -7,3 +16,97 @@ def test_get_all_books(fake_session, fake_book_service, test_client):
     assert fake_book_service.get_all_books_called_once_with(fake_session)
     # assert response.status_code == 200
     # assert response.json() == []
+
+
+def test_book_cursor_round_trip():
+    created_at, uid = datetime(2025, 3, 13, 11, 42, 22), uuid4()
+    assert decode_cursor(encode_cursor(created_at, uid)) == (created_at, uid)
+
+
+def test_fast_serializers_match_response_models():
+    book = Book(
+        uid=uuid4(),
+        title="Ünïcode",
+        author="Author",
+        publisher="Publisher",
+        published_date=date(2020, 1, 1),
+        page_count=10,
+        language="English",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 2, 3, 4, 5, 678),
+    )
+    book.reviews = [
+        Review(
+            uid=uuid4(),
+            book_uid=book.uid,
+            rating=4,
+            review_text="Good",
+            created_at=datetime(2024, 2, 1),
+            updated_at=datetime(2024, 2, 1),
+        )
+    ]
+    page = {"items": [book], "next_cursor": "abc"}
+
+    expected_page = BookPageModel.model_validate(page, from_attributes=True)
+    expected_detail = BookDetailModel.model_validate(book, from_attributes=True)
+
+    assert dump_book_page(page) == expected_page.model_dump_json().encode()
+    assert dump_book_detail(book) == expected_detail.model_dump_json().encode()
+
+
+def test_export_streams_catalog_with_review_aggregates(seeded_db, db_client):
+    response = db_client.get(f"{books_prefix}/export")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Book 0", "Book 1", "Book 2"]
+    assert rows[0]["review_count"] == 1
+    assert rows[0]["average_rating"] == 4.0
+
+    response = db_client.get(f"{books_prefix}/export", params={"format": "csv"})
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == 3
+    assert rows[0]["review_count"] == "1"
+
+
+def test_import_reports_bad_rows_and_inserts_the_rest(seeded_db, db_client):
+    good = {
+        "title": "Imported",
+        "author": "Author",
+        "publisher": "Publisher",
+        "published_date": "2021-05-06",
+        "page_count": 120,
+        "language": "English",
+    }
+    body = "\n".join(
+        [
+            json.dumps(good),
+            json.dumps({**good, "page_count": "many"}),
+            "{not json",
+            "",
+            json.dumps({**good, "title": "Imported 2"}),
+        ]
+    )
+    response = db_client.post(f"{books_prefix}/import", content=body)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["error"].startswith("page_count:")
+
+    titles = [b["title"] for b in db_client.get(f"{books_prefix}/").json()["items"]]
+    assert {"Imported", "Imported 2"} <= set(titles)
+
+
+def test_import_csv(seeded_db, db_client):
+    body = (
+        "title,author,publisher,published_date,page_count,language\r\n"
+        '"Comma, Book",Author,Publisher,2021-05-06,120,English\r\n'
+        "Bad Date,Author,Publisher,06/05/2021,120,English\r\n"
+    )
+    response = db_client.post(
+        f"{books_prefix}/import", params={"format": "csv"}, content=body
+    )
+    assert response.json()["imported"] == 1
+    assert response.json()["errors"][0]["line"] == 3
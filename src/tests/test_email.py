@@ -0,0 +1,186 @@
+import asyncio
+import aiosmtplib
+import pytest
+from fastapi import BackgroundTasks
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src import celery_tasks, outbox
+from src.celery_tasks import EmailDispatcher
+from src.db.models import EmailOutbox
+from src.mail import SMTPConnectionPool, mail_config, create_message
+
+
+def test_dispatcher_opens_circuit_when_broker_fails(monkeypatch):
+    sent = []
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unreachable")
+
+    async def send_message(message):
+        sent.append(message.recipients)
+
+    monkeypatch.setattr(celery_tasks.send_email, "apply_async", broker_down)
+    monkeypatch.setattr(celery_tasks.mail, "send_message", send_message)
+    monkeypatch.setattr(celery_tasks.Config, "EMAIL_BREAKER_THRESHOLD", 2)
+
+    async def run():
+        dispatcher = EmailDispatcher()
+        worker = dispatcher.start()
+        background_tasks = BackgroundTasks()
+        for i in range(2):
+            dispatcher.enqueue(
+                [f"user{i}@bookly.com"], "Hi", "<p>Hi</p>", background_tasks
+            )
+        await dispatcher.queue.join()
+
+        # With the circuit open the request path skips the queue entirely
+        dispatcher.enqueue(["user2@bookly.com"], "Hi", "<p>Hi</p>", background_tasks)
+        worker.cancel()
+        return dispatcher, background_tasks
+
+    dispatcher, background_tasks = asyncio.run(run())
+    assert not dispatcher.broker_available
+    assert len(sent) == 2
+    assert len(background_tasks.tasks) == 1
+
+
+def outbox_rows(seeded_db):
+    async def load():
+        async with AsyncSession(seeded_db.engine) as session:
+            return (await session.exec(select(EmailOutbox))).all()
+
+    return asyncio.run(load())
+
+
+def test_signup_writes_verification_email_to_outbox(seeded_db, db_client):
+    response = db_client.post(
+        "/api/v1/user/signup",
+        json={
+            "username": "newbie",
+            "email": "newbie@bookly.com",
+            "first_name": "New",
+            "last_name": "Reader",
+            "password": "secret123",
+        },
+    )
+
+    assert response.status_code == 201
+    [email] = outbox_rows(seeded_db)
+    assert email.recipients == ["newbie@bookly.com"]
+    assert email.status == "pending"
+
+
+def test_drain_outbox_hands_batch_to_celery(seeded_db, monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        outbox.deliver_outbox_emails,
+        "apply_async",
+        lambda args, retry: batches.append(args[0]),
+    )
+
+    async def drain():
+        async with seeded_db.session_maker() as session:
+            for i in range(3):
+                outbox.add_email_to_outbox(
+                    session, [f"user{i}@bookly.com"], "Hi", "<p>Hi</p>"
+                )
+            await session.commit()
+            return await outbox.drain_outbox(session)
+
+    assert asyncio.run(drain()) == 3
+    assert len(batches) == 1 and len(batches[0]) == 3
+    # Claimed, but not sent until the worker confirms each message
+    assert {email.status for email in outbox_rows(seeded_db)} == {"dispatched"}
+
+
+def test_worker_marks_only_sent_outbox_emails(seeded_db, monkeypatch):
+    monkeypatch.setattr(
+        outbox.deliver_outbox_emails, "apply_async", lambda args, retry: None
+    )
+
+    async def send_messages(messages):
+        return [0, 2], {1: ConnectionError("mailbox full")}
+
+    monkeypatch.setattr(celery_tasks.smtp_pool, "send_messages", send_messages)
+
+    async def deliver():
+        async with seeded_db.session_maker() as session:
+            emails = [
+                outbox.add_email_to_outbox(
+                    session, [f"user{i}@bookly.com"], "Hi", "<p>Hi</p>"
+                )
+                for i in range(3)
+            ]
+            await session.commit()
+            await outbox.drain_outbox(session)
+            uids = [str(email.uid) for email in emails]
+
+        async with seeded_db.session_maker() as session:
+            sent = await celery_tasks.send_outbox_emails(session, uids)
+        # A redelivered claim does not send the same emails again
+        async with seeded_db.session_maker() as session:
+            resent = await celery_tasks.send_outbox_emails(session, uids)
+        return sent, resent
+
+    assert asyncio.run(deliver()) == (2, 0)
+    rows = {email.recipients[0]: email for email in outbox_rows(seeded_db)}
+    assert rows["user0@bookly.com"].status == "sent"
+    assert rows["user2@bookly.com"].status == "sent"
+    assert (rows["user1@bookly.com"].status, rows["user1@bookly.com"].attempts) == (
+        "pending",
+        1,
+    )
+
+
+def test_drain_outbox_backs_off_when_broker_is_down(seeded_db, monkeypatch):
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unreachable")
+
+    monkeypatch.setattr(outbox.deliver_outbox_emails, "apply_async", broker_down)
+
+    async def drain():
+        async with seeded_db.session_maker() as session:
+            outbox.add_email_to_outbox(session, ["user@bookly.com"], "Hi", "<p>Hi</p>")
+            await session.commit()
+            return await outbox.drain_outbox(session), await outbox.drain_outbox(
+                session
+            )
+
+    assert asyncio.run(drain()) == (1, 0)
+    [email] = outbox_rows(seeded_db)
+    assert (email.status, email.attempts) == ("pending", 1)
+
+
+def test_send_messages_reports_failures_per_message(monkeypatch):
+    class FakeSMTP:
+        is_connected = True
+
+        async def send_message(self, message):
+            if message["To"] == "bounce@bookly.com":
+                raise aiosmtplib.SMTPDataError(554, "rejected")
+
+    pool = SMTPConnectionPool(mail_config, size=1)
+
+    async def connect():
+        return FakeSMTP()
+
+    monkeypatch.setattr(pool, "_connect", connect)
+    messages = [
+        create_message([recipient], "Hi", "<p>Hi</p>")
+        for recipient in ["a@bookly.com", "bounce@bookly.com", "b@bookly.com"]
+    ]
+
+    sent, failed = asyncio.run(pool.send_messages(messages))
+    assert sent == [0, 2]
+    assert list(failed) == [1]
+
+
+def test_send_email_task_raises_when_the_send_fails(monkeypatch):
+    error = aiosmtplib.SMTPDataError(554, "rejected")
+
+    async def send_messages(messages):
+        return [], {0: error}
+
+    monkeypatch.setattr(celery_tasks.smtp_pool, "send_messages", send_messages)
+    with pytest.raises(aiosmtplib.SMTPDataError):
+        celery_tasks.send_email.run(["user@bookly.com"], "Hi", "<p>Hi</p>")
@@ -0,0 +1,66 @@
+books_prefix = f"/api/v1/books"
+
+
+def test_book_detail_not_modified_skips_loading(seeded_db, db_client):
+    url = f"{books_prefix}/{seeded_db.books[0].uid}"
+    response = db_client.get(url)
+    etag = response.headers["etag"]
+
+    seeded_db.statements.clear()
+    response = db_client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    # user lookup for auth and the book version only
+    assert len(seeded_db.statements) == 2
+
+
+def test_book_detail_etag_changes_on_write(seeded_db, db_client):
+    book_uid = seeded_db.books[0].uid
+    url = f"{books_prefix}/{book_uid}"
+    etag = db_client.get(url).headers["etag"]
+
+    db_client.post(
+        f"/api/v1/reviews/book/{book_uid}", json={"rating": 3, "review_text": "Fine"}
+    )
+    response = db_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    etag = response.headers["etag"]
+    db_client.put(url, json={"title": "Renamed"})
+    response = db_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+
+
+def test_lists_and_me_use_content_etags(seeded_db, db_client):
+    for url in [f"{books_prefix}/", "/api/v1/user/me"]:
+        response = db_client.get(url)
+        etag = response.headers["etag"]
+        for if_none_match, status_code in [(etag, 304), ('"other"', 200)]:
+            headers = {"If-None-Match": if_none_match}
+            assert db_client.get(url, headers=headers).status_code == status_code
+
+
+def test_if_match_guards_concurrent_updates(seeded_db, db_client):
+    url = f"{books_prefix}/{seeded_db.books[0].uid}"
+    etag = db_client.get(url).headers["etag"]
+
+    seeded_db.statements.clear()
+    response = db_client.put(url, json={"title": "First"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    # user lookup for auth and a single UPDATE ... RETURNING
+    assert len(seeded_db.statements) == 2
+
+    response = db_client.put(url, json={"title": "Second"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert response.json()["error_code"] == "precondition_failed"
+
+    response = db_client.delete(url, headers={"If-Match": etag})
+    assert response.status_code == 412
+
+    new_etag = db_client.get(url).headers["etag"]
+    assert db_client.delete(url, headers={"If-Match": new_etag}).status_code == 200
+    assert db_client.delete(url).status_code == 404
@@ -0,0 +1,65 @@
+import asyncio
+from sqlalchemy import event
+
+books_prefix = f"/api/v1/books"
+
+
+def explain_selects(seeded_db, client, url):
+    executed = []
+
+    @event.listens_for(seeded_db.engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    response = client.get(url)
+    event.remove(seeded_db.engine.sync_engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+
+    async def explain():
+        plans = []
+        async with seeded_db.engine.connect() as conn:
+            for statement, parameters in executed:
+                if statement.lstrip().upper().startswith("SELECT"):
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                    plans.append((statement, [row[-1] for row in result]))
+        return plans
+
+    return asyncio.run(explain())
+
+
+def assert_index_served(plans):
+    assert plans
+    for statement, details in plans:
+        for detail in details:
+            # a bare "SCAN <table>" is a full table scan, and a temp b-tree
+            # means the ORDER BY was not satisfied by an index
+            assert "USING" in detail or not detail.startswith("SCAN"), statement
+            assert "TEMP B-TREE" not in detail, statement
+
+
+def test_list_books_uses_indexes(seeded_db, db_client):
+    first_page = db_client.get(f"{books_prefix}/", params={"limit": 1}).json()
+    url = f"{books_prefix}/?limit=1&cursor={first_page['next_cursor']}"
+    assert_index_served(explain_selects(seeded_db, db_client, url))
+
+
+def test_user_books_uses_indexes(seeded_db, db_client):
+    url = f"{books_prefix}/user/{seeded_db.user.uid}"
+    assert_index_served(explain_selects(seeded_db, db_client, url))
+
+
+def test_book_detail_uses_indexes(seeded_db, db_client):
+    url = f"{books_prefix}/{seeded_db.books[0].uid}"
+    assert_index_served(explain_selects(seeded_db, db_client, url))
+
+
+def test_top_rated_uses_indexes(seeded_db, db_client):
+    plans = explain_selects(seeded_db, db_client, f"{books_prefix}/top-rated")
+    assert_index_served(plans)
+    assert any(
+        "ix_books_rating_score_uid" in detail
+        for _, details in plans
+        for detail in details
+    )
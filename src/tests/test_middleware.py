@@ -0,0 +1,36 @@
+import logging
+from src.middleware import access_logger
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.access)
+
+
+def test_access_log_records_route_template(seeded_db, db_client):
+    handler = RecordingHandler()
+    access_logger.addHandler(handler)
+    try:
+        db_client.get(f"/api/v1/books/{seeded_db.books[0].uid}")
+    finally:
+        access_logger.removeHandler(handler)
+
+    [record] = handler.records
+    assert record["method"] == "GET"
+    assert record["route"] == "/api/v1/books/{book_uid}"
+    assert record["status"] == 200
+    assert record["duration_ns"] > 0
+    assert record["response_bytes"] > 0
+
+
+def test_metrics_endpoint_reports_route_latency(seeded_db, db_client):
+    db_client.get("/api/v1/books/")
+    response = db_client.get("/metrics/")
+
+    assert response.status_code == 200
+    assert 'route="/api/v1/books/"' in response.text
+    assert "bookly_db_query_duration_seconds_count" in response.text
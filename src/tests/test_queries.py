@@ -0,0 +1,160 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from src.books.service import BookService
+from src.config import Config
+from src.db.instrumentation import QueryStats, normalize_statement
+
+books_prefix = f"/api/v1/books"
+auth_prefix = f"/api/v1/user"
+
+
+def count_statements(seeded_db, client, url):
+    seeded_db.statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return len(seeded_db.statements)
+
+
+def test_list_books_does_not_load_relationships(seeded_db, db_client):
+    # one user lookup for auth, one page of books
+    assert count_statements(seeded_db, db_client, f"{books_prefix}/") == 2
+
+
+def test_user_books_does_not_load_relationships(seeded_db, db_client):
+    url = f"{books_prefix}/user/{seeded_db.user.uid}"
+    assert count_statements(seeded_db, db_client, url) == 2
+
+
+def test_book_detail_loads_reviews_only(seeded_db, db_client):
+    url = f"{books_prefix}/{seeded_db.books[0].uid}"
+    # user lookup, the book version, the book, its reviews
+    assert count_statements(seeded_db, db_client, url) == 4
+
+
+def test_me_loads_books_and_reviews(seeded_db, db_client):
+    # user lookup for auth, then the user's books and reviews
+    assert count_statements(seeded_db, db_client, f"{auth_prefix}/me") == 3
+    response = db_client.get(f"{auth_prefix}/me")
+    assert len(response.json()["books"]) == 3
+    assert len(response.json()["reviews"]) == 3
+
+
+def test_write_endpoints_stay_within_query_budget(seeded_db, query_budget):
+    book = {
+        "title": "New Book",
+        "author": "Author",
+        "publisher": "Publisher",
+        "published_date": "2021-01-01",
+        "page_count": 10,
+        "language": "English",
+    }
+    response = query_budget("POST", f"{books_prefix}/", 2, json=book)
+    assert response.status_code == 201
+
+    book_uid = response.json()["uid"]
+    response = query_budget(
+        "POST",
+        f"/api/v1/reviews/book/{book_uid}",
+        4,
+        json={"rating": 5, "review_text": "Great"},
+    )
+    assert response.status_code == 200
+
+
+def test_server_timing_header_in_debug(seeded_db, db_client, monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", True)
+    response = db_client.get(f"{books_prefix}/")
+
+    assert response.headers["server-timing"].endswith('desc="2 queries"')
+
+
+def test_repeated_statements_are_reported_as_n_plus_one(caplog):
+    assert normalize_statement(
+        "SELECT * FROM books WHERE uid = $1 AND page_count > 10"
+    ) == normalize_statement("SELECT *  FROM books WHERE uid = $7 AND page_count > 99")
+    assert normalize_statement("WHERE uid IN (?, ?, ?)") == "WHERE uid IN (?)"
+
+    stats = QueryStats()
+    for i in range(10):
+        stats.record(f"SELECT * FROM reviews WHERE book_uid = '{i}'", 0.001)
+
+    assert stats.count == 10
+    assert len([r for r in caplog.records if "N+1" in r.getMessage()]) == 1
+
+
+def test_failed_statements_do_not_leak_query_timers(seeded_db):
+    async def run():
+        async with seeded_db.engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.execute(text("SELECT 1"))
+            return conn.sync_connection.info["query_start_time"]
+
+    assert asyncio.run(run()) == []
+
+
+def test_batch_fetches_books_in_one_query(seeded_db, db_client):
+    unknown = str(uuid4())
+    uids = [str(seeded_db.books[2].uid), unknown, str(seeded_db.books[0].uid)]
+
+    seeded_db.statements.clear()
+    response = db_client.post(f"{books_prefix}/batch", json={"uids": uids})
+
+    assert [book["uid"] for book in response.json()["items"]] == [uids[0], uids[2]]
+    assert response.json()["missing"] == [unknown]
+    # user lookup for auth, one query for every book
+    assert len(seeded_db.statements) == 2
+
+    response = db_client.post(f"{books_prefix}/batch", json={"uids": [unknown] * 501})
+    assert response.status_code == 422
+
+
+def test_concurrent_book_lookups_share_one_query(seeded_db):
+    async def load():
+        async with seeded_db.session_maker() as session:
+            seeded_db.statements.clear()
+            books = await asyncio.gather(
+                *[
+                    BookService().get_book_by_id(book.uid, session)
+                    for book in seeded_db.books
+                ]
+            )
+            return [book.title for book in books], len(seeded_db.statements)
+
+    assert asyncio.run(load()) == (["Book 0", "Book 1", "Book 2"], 1)
+
+
+def test_book_lookups_during_a_query_wait_for_it(seeded_db, monkeypatch):
+    async def load():
+        async with seeded_db.session_maker() as session:
+            running, overlaps = 0, []
+            exec = session.exec
+
+            async def tracked_exec(*args, **kwargs):
+                nonlocal running
+                running += 1
+                overlaps.append(running)
+                try:
+                    return await exec(*args, **kwargs)
+                finally:
+                    running -= 1
+
+            monkeypatch.setattr(session, "exec", tracked_exec)
+            service = BookService()
+            first = asyncio.ensure_future(
+                service.get_book_by_id(seeded_db.books[0].uid, session)
+            )
+            while not overlaps:
+                await asyncio.sleep(0)
+            # arrives while the first query is still running
+            second = await asyncio.gather(
+                *[service.get_book_by_id(b.uid, session) for b in seeded_db.books[1:]]
+            )
+            return [(await first).title] + [b.title for b in second], max(overlaps)
+
+    titles, max_running = asyncio.run(load())
+    assert titles == ["Book 0", "Book 1", "Book 2"]
+    assert max_running == 1
@@ -0,0 +1,49 @@
+import asyncio
+from sqlmodel import update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.books.ratings import recompute_rating_aggregates
+from src.db.models import Book
+
+books_prefix = f"/api/v1/books"
+
+
+def test_new_review_updates_aggregates_and_ranking(seeded_db, db_client):
+    book = seeded_db.books[1]
+    response = db_client.post(
+        f"/api/v1/reviews/book/{book.uid}", json={"rating": 4, "review_text": "Again"}
+    )
+    assert response.status_code == 200
+
+    top_rated = db_client.get(f"{books_prefix}/top-rated").json()
+    assert top_rated[0]["uid"] == str(book.uid)
+    assert top_rated[0]["review_count"] == 2
+    assert top_rated[0]["rating_score"] > top_rated[1]["rating_score"]
+
+
+def test_review_rating_must_be_between_one_and_five(seeded_db, db_client):
+    url = f"/api/v1/reviews/book/{seeded_db.books[0].uid}"
+    for rating in [0, 6]:
+        response = db_client.post(url, json={"rating": rating, "review_text": "Hm"})
+        assert response.status_code == 422
+
+
+def test_repair_fixes_drifted_aggregates(seeded_db, db_client):
+    book = seeded_db.books[2]
+
+    async def repair():
+        async with AsyncSession(seeded_db.engine) as session:
+            await session.exec(
+                update(Book)
+                .where(Book.uid == book.uid)
+                .values(review_count=7, rating_sum=1, rating_score=0.5)
+            )
+            await session.commit()
+            return [
+                await recompute_rating_aggregates(session),
+                await recompute_rating_aggregates(session),
+            ]
+
+    assert asyncio.run(repair()) == [1, 0]
+    repaired = db_client.get(f"{books_prefix}/{book.uid}").json()
+    assert repaired["review_count"] == 1
+    assert repaired["rating_score"] == seeded_db.books[0].rating_score
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from functools import partial
+from redis.exceptions import ConnectionError
+from src.books import cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.tags = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def incr(self, key):
+        self.tags.append(key)
+
+    async def execute(self):
+        for key in self.tags:
+            self.redis.data[key] = str(int(self.redis.data.get(key, 0)) + 1).encode()
+
+
+def make_loader(calls):
+    async def load(session):
+        calls.append(session)
+        return f'{{"call": {len(calls)}}}'.encode()
+
+    return load
+
+
+def test_cached_response_until_tag_is_invalidated(monkeypatch):
+    monkeypatch.setattr(cache, "redis_client", FakeRedis())
+    response_cache = cache.ResponseCache()
+    calls = []
+    load = make_loader(calls)
+
+    get = partial(response_cache.get_or_load, "book", {"uid": 1}, ["book:1"], load, "s")
+
+    async def scenario():
+        first = await get()
+        second = await get()
+        await response_cache.invalidate("book:1")
+        third = await get()
+        return first, second, third
+
+    assert asyncio.run(scenario()) == (b'{"call": 1}', b'{"call": 1}', b'{"call": 2}')
+
+
+def test_stale_response_is_served_while_refreshing(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", redis)
+    response_cache = cache.ResponseCache()
+    calls = []
+    load = make_loader(calls)
+
+    class FakeSession:
+        async def __aenter__(self):
+            return "background"
+
+        async def __aexit__(self, *args):
+            pass
+
+    monkeypatch.setattr(cache, "async_session_maker", FakeSession)
+
+    get = partial(response_cache.get_or_load, "books:list", {}, ["books"], load, "s")
+
+    async def scenario():
+        await get()
+        key = next(k for k in redis.data if k.startswith(cache.RESPONSE_CACHE_PREFIX))
+        body = redis.data[key].split(b"\n", 1)[1]
+        redis.data[key] = f"{time.time() - 1:.3f}\n".encode() + body
+
+        stale = await get()
+        await asyncio.gather(*response_cache.refresh_tasks)
+        fresh = await get()
+        return stale, fresh
+
+    assert asyncio.run(scenario()) == (b'{"call": 1}', b'{"call": 2}')
+    assert calls == ["s", "background"]
+
+
+def test_redis_outage_falls_back_to_loader(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(cache.redis_client, "mget", unavailable)
+    load = make_loader([])
+    body = asyncio.run(
+        cache.ResponseCache().get_or_load("books:list", {}, ["books"], load, "s")
+    )
+    assert body == b'{"call": 1}'
@@ -0,0 +1,62 @@
+from sqlalchemy.dialects import postgresql
+from src.books.search import PostgresBookSearch
+
+books_prefix = f"/api/v1/books"
+
+
+def test_search_ranks_paginates_and_highlights(seeded_db, db_client):
+    response = db_client.get(f"{books_prefix}/search", params={"q": "book 1"})
+    items = response.json()["items"]
+    assert [item["title"] for item in items] == ["Book 1"]
+    assert items[0]["highlights"]["title"] == "<b>Book</b> <b>1</b>"
+    assert items[0]["highlights"]["author"] == "Author"
+
+    response = db_client.get(
+        f"{books_prefix}/search", params={"q": "author", "limit": 2}
+    )
+    page = response.json()
+    assert len(page["items"]) == 2
+    assert page["next_offset"] == 2
+
+    response = db_client.get(
+        f"{books_prefix}/search", params={"q": "author", "limit": 2, "offset": 2}
+    )
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_offset"] is None
+
+
+def test_search_index_follows_writes(seeded_db, db_client):
+    book_uid = seeded_db.books[0].uid
+    assert (
+        db_client.get(f"{books_prefix}/search", params={"q": "dune"}).json()["items"]
+        == []
+    )
+
+    db_client.put(f"{books_prefix}/{book_uid}", json={"title": "Dune"})
+    items = db_client.get(f"{books_prefix}/search", params={"q": "dune"}).json()[
+        "items"
+    ]
+    assert [item["uid"] for item in items] == [str(book_uid)]
+
+
+def test_search_highlights_escape_stored_markup(seeded_db, db_client):
+    book_uid = seeded_db.books[0].uid
+    db_client.put(
+        f"{books_prefix}/{book_uid}", json={"title": "<script>alert(1)</script> Dune"}
+    )
+
+    [item] = db_client.get(f"{books_prefix}/search", params={"q": "dune"}).json()[
+        "items"
+    ]
+    assert item["highlights"]["title"] == (
+        "&lt;script&gt;alert(1)&lt;/script&gt; <b>Dune</b>"
+    )
+
+
+def test_postgres_search_uses_the_search_vector():
+    statement = PostgresBookSearch()._statement("dune herbert", 20, 0)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "books.search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_rank_cd(books.search_vector" in sql
+    assert "ts_headline" in sql
@@ -0,0 +1,90 @@
+import asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db.main import get_session, get_session_maker
+from src.main import app
+from src.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"body"
+
+    async def scenario():
+        results = await asyncio.gather(*[flight.do("book", load) for _ in range(10)])
+        # finished calls are not reused
+        results.append(await flight.do("book", load))
+        return results
+
+    assert asyncio.run(scenario()) == [b"body"] * 11
+    assert len(calls) == 2
+    assert flight.stats() == {"leaders": 2, "coalesced": 9, "in_flight": 0}
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("book", load))
+        second = asyncio.ensure_future(flight.do("book", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database is down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *[flight.do("book", load) for _ in range(3)], return_exceptions=True
+        )
+
+    assert all(isinstance(e, RuntimeError) for e in asyncio.run(scenario()))
+
+
+def test_concurrent_detail_reads_fit_in_a_one_connection_pool(seeded_db, tmp_path):
+    # Waiting requests must not hold a connection the leader's fetch needs
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'bookly.db'}",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_pooled_session():
+        async with Session() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_pooled_session
+    app.dependency_overrides[get_session_maker] = lambda: Session
+    url = f"/api/v1/books/{seeded_db.books[0].uid}"
+
+    async def scenario():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://localhost"
+        ) as client:
+            responses = await asyncio.gather(*[client.get(url) for _ in range(5)])
+        await engine.dispose()
+        return [response.status_code for response in responses]
+
+    assert asyncio.run(scenario()) == [200] * 5